@@ -1,18 +1,27 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
+from pydantic import BaseModel
 from typing import List
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
 import tempfile
+import shutil
 import os
 import json
 import logging
 from pathlib import Path
 from PIL import Image
 import numpy as np
-import cv2
 from datetime import datetime
 import io
 import sys
+import math
+import hashlib
+import copy
+from html import escape
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -20,6 +29,8 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib.pagesizes import letter
 import base64
 from enhanced_recommendations import MedicalRecommendationEngine
@@ -28,6 +39,199 @@ from enhanced_recommendations import MedicalRecommendationEngine
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# OpenCV and Numba are imported on first use so that processes serving only the
+# lightweight endpoints (health, body parts, PDF rendering) never pay for loading them
+_cv2_mod = None
+
+def _cv2():
+    """Return the cv2 module, importing it on first call"""
+    global _cv2_mod
+    if _cv2_mod is None:
+        import cv2
+        _cv2_mod = cv2
+    return _cv2_mod
+
+# Optional fast JSON decoding for report payloads
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Medical report templates: static sections are rendered once here and only the
+# dynamic fields are filled in per report. A trailing newline yields the blank
+# separator line once the sections are joined.
+_SEP60 = "=" * 60
+_SEP80 = "=" * 80
+
+_REPORT_HEADER = f"{_SEP60}\nDARKMED AI - MEDICAL IMAGE ANALYSIS REPORT\n{_SEP60}\n"
+_ENHANCED_REPORT_HEADER = f"{_SEP80}\nMEDSCOPE-AI - ENHANCED MEDICAL IMAGE ANALYSIS REPORT\n{_SEP80}\n"
+
+_PATIENT_TMPL = (
+    "PATIENT INFORMATION:\n"
+    "File: {filename}\n"
+    "Body Part: {body_part}\n"
+    "Analysis Date: {analysis_date}\n"
+)
+
+_CLASSIFICATION_TMPL = (
+    "MEDICAL CLASSIFICATION:\n"
+    "Condition: {condition}\n"
+    "Risk Level: {risk_level}\n"
+    "Urgency: {urgency}\n"
+    "Risk Score: {risk_score}/100"
+)
+
+_ENHANCED_CLASSIFICATION_TMPL = (
+    "Risk Level: {risk_level}\n"
+    "Risk Score: {risk_score}/100\n"
+    "Urgency: {urgency}\n"
+    "Confidence Level: {confidence_level}"
+)
+
+_RISK_TMPL = (
+    "COMPREHENSIVE RISK ASSESSMENT:\n"
+    "Risk Category: {risk_category}\n"
+    "Urgency Level: {urgency_level}"
+)
+
+_CLINICAL_SIGNIFICANCE_TMPL = (
+    "\nClinical Significance:\n"
+    "  • Clinical Impact: {clinical_impact}\n"
+    "  • Treatment Urgency: {treatment_urgency}\n"
+    "  • Prognosis Impact: {prognosis_impact}"
+)
+
+_FINDINGS_TMPL = (
+    "MEDICAL FINDINGS:\n"
+    "Potential Masses/Lesions: {potential_masses}\n"
+    "Asymmetry: {asymmetry}\n"
+    "Asymmetry Details: {asymmetry_interpretation}\n"
+    "Texture Variations: {texture_variations}\n"
+    "Contour Analysis: {contour_analysis}"
+)
+
+_QUALITY_TMPL = (
+    "IMAGE QUALITY ASSESSMENT:\n"
+    "Overall Rating: {overall_rating}\n"
+    "Sharpness: {sharpness_rating}\n"
+    "Contrast: {contrast_rating}\n"
+    "Noise Level: {noise_rating}\n"
+)
+
+_TECHNICAL_TMPL = (
+    "TECHNICAL DETAILS:\n"
+    "Image Dimensions: {image_dimensions}\n"
+    "Analysis Algorithm: {analysis_algorithm}\n"
+    "Confidence Score: {confidence_score}\n"
+)
+
+_ENHANCED_TECHNICAL_TMPL = (
+    "TECHNICAL DETAILS:\n"
+    "Image Dimensions: {image_dimensions}\n"
+    "Analysis Algorithm: Enhanced Deep Tissue Analysis v2.0\n"
+    "Confidence Metrics: {confidence_level}\n"
+)
+
+_DISCLAIMER = (
+    "DISCLAIMER:\n"
+    "This is a preliminary AI-assisted analysis for licensed clinicians only.\n"
+    "This is not a diagnosis and should not replace professional medical judgment.\n"
+    "Always consult with qualified healthcare providers for proper diagnosis and treatment."
+)
+
+# (recommendation key, report label) pairs in report order
+_REPORT_RECOMMENDATION_SECTIONS = (
+    ('risk_based_recommendations', 'Risk-Based Actions'),
+    ('medical_recommendations', 'Medical Actions'),
+    ('general_recommendations', 'General Actions'),
+)
+
+_ENHANCED_REPORT_RECOMMENDATION_SECTIONS = (
+    ('urgency_based_actions', 'Urgency-Based Actions'),
+    ('risk_based_recommendations', 'Risk-Based Recommendations'),
+    ('medical_recommendations', 'Medical Recommendations'),
+    ('patient_management', 'Patient Management'),
+    ('specialist_consultations', 'Specialist Consultations'),
+    ('imaging_recommendations', 'Imaging Recommendations'),
+    ('monitoring_recommendations', 'Monitoring Recommendations'),
+)
+
+# Conditions whose supporting evidence is listed in reports, in report order
+_CONDITION_EVIDENCE_KEYS = ('tumor', 'hemorrhage', 'fracture')
+
+_REPORT_RISK_SECTIONS = (
+    ('immediate_risks', 'Immediate Risks'),
+    ('short_term_risks', 'Short-term Risks'),
+    ('long_term_risks', 'Long-term Risks'),
+)
+
+# Numeric score for each categorical classification confidence level
+_CONFIDENCE_MAP = {"LOW": 0.4, "MODERATE": 0.7, "HIGH": 0.9}
+
+def _hist_stats(hist):
+    """Mean, std, skewness, kurtosis, entropy, min and max of a 256-bin histogram.
+    All central moments are accumulated in one scalar loop without temporaries.
+    """
+    n = 0.0
+    s = 0.0
+    lo = -1
+    hi = -1
+    for i in range(256):
+        c = hist[i]
+        if c > 0:
+            if lo < 0:
+                lo = i
+            hi = i
+            n += c
+            s += c * i
+    mean = s / n
+    var = 0.0
+    m3 = 0.0
+    m4 = 0.0
+    ent = 0.0
+    for i in range(256):
+        c = hist[i]
+        if c > 0:
+            d = i - mean
+            d2 = d * d
+            var += c * d2
+            m3 += c * d2 * d
+            m4 += c * d2 * d2
+            p = c / n
+            ent -= p * math.log2(p)
+    var /= n
+    sd = math.sqrt(var)
+    skew = 0.0
+    kurt = 0.0
+    if sd > 0:
+        skew = (m3 / n) / (var * sd)
+        kurt = (m4 / n) / (var * var) - 3.0
+    return mean, sd, skew, kurt, ent, lo, hi
+
+_hist_stats_fn = None
+
+def _hist_stats_kernel():
+    """Return _hist_stats, JIT-compiled with Numba when available, resolving it on first call"""
+    global _hist_stats_fn
+    if _hist_stats_fn is None:
+        try:
+            from numba import njit
+            _hist_stats_fn = njit(cache=True, fastmath=True)(_hist_stats)
+        except ImportError:
+            logger.info("Numba not available, histogram statistics run in plain Python")
+            _hist_stats_fn = _hist_stats
+    return _hist_stats_fn
+
+class _ReportFields(dict):
+    """format_map mapping that renders missing report fields as N/A"""
+    def __missing__(self, key):
+        return 'N/A'
+
+def _bullet_lines(items):
+    """Render items as indented report bullet lines"""
+    return "\n".join(f"  • {item}" for item in items)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="DarkMed AI - Medical Analysis API",
@@ -62,6 +266,7 @@ class EnhancedMedicalAnalyzer:
         self.max_contour_area_ratio = 0.15    # 15% of image area
         self.min_circularity = 0.25           # More permissive for irregular masses
         self.min_solidity = 0.55              # Adjusted for better detection
+        self.downscale_min_side = 256         # Global colour statistics run at half resolution above this size
         
         # Enhanced body-part priors with more precise modulation
         self.BODY_PART_CONDITION_PRIORS = {
@@ -105,12 +310,23 @@ class EnhancedMedicalAnalyzer:
             "pattern_factor": {"irregular": 20, "suspicious": 15, "regular": 5},
             "multiplicity_factor": {"multiple": 15, "bilateral": 20, "single": 5}
         }
+        
+        # Offload full-image reductions to the GPU when OpenCV is built with CUDA;
+        # probed on the first histogram so constructing the analyzer stays cheap
+        self._use_cuda = None
     
     def analyze_image(self, image_path: str, filename: str, body_part: str = "unknown"):
         """Analyze medical image and provide comprehensive analysis with enhanced accuracy"""
+        # Load and preprocess image
+        return self._analyze_image_data(self._load_and_preprocess_image(image_path), filename, body_part)
+    
+    def analyze_image_bytes(self, data: bytes, filename: str, body_part: str = "unknown"):
+        """Analyze an encoded image held in memory, without a round-trip through the filesystem"""
+        return self._analyze_image_data(self._decode_image_bytes(data), filename, body_part)
+    
+    def _analyze_image_data(self, image_data, filename: str, body_part: str):
+        """Run the full analysis pipeline on loaded image data"""
         try:
-            # Load and preprocess image
-            image_data = self._load_and_preprocess_image(image_path)
             if image_data is None:
                 return self._create_error_analysis(filename, "Failed to load image")
             
@@ -164,39 +380,103 @@ class EnhancedMedicalAnalyzer:
     
     def _load_and_preprocess_image(self, image_path: str):
         """Load and preprocess image using OpenCV and PIL fallback"""
+        cv2 = _cv2()
         try:
             # Try OpenCV first
             image = cv2.imread(image_path)
             if image is not None:
-                # Convert BGR to RGB
-                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                return {
-                    'opencv_image': image,
-                    'rgb_image': image_rgb,
-                    'height': image.shape[0],
-                    'width': image.shape[1],
-                    'channels': image.shape[2] if len(image.shape) > 2 else 1
-                }
+                return self._build_image_data(image)
         except Exception as e:
             logger.warning(f"OpenCV failed, trying PIL: {e}")
         
         try:
             # PIL fallback
             with Image.open(image_path) as img:
-                img_array = np.array(img)
-                return {
-                    'pil_image': img,
-                    'array': img_array,
-                    'height': img.height,
-                    'width': img.width,
-                    'channels': len(img_array.shape) if len(img_array.shape) > 2 else 1
-                }
+                return self._build_pil_image_data(img)
         except Exception as e:
             logger.error(f"Both OpenCV and PIL failed: {e}")
             return None
     
+    def _decode_image_bytes(self, data: bytes):
+        """Decode and preprocess an in-memory encoded image using OpenCV and PIL fallback"""
+        cv2 = _cv2()
+        try:
+            # Try OpenCV first
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if image is not None:
+                return self._build_image_data(image)
+        except Exception as e:
+            logger.warning(f"OpenCV decode failed, trying PIL: {e}")
+        
+        try:
+            # PIL fallback
+            with Image.open(io.BytesIO(data)) as img:
+                return self._build_pil_image_data(img)
+        except Exception as e:
+            logger.error(f"Both OpenCV and PIL failed: {e}")
+            return None
+    
+    def _build_image_data(self, image):
+        """Build the shared image_data dict from a decoded BGR image"""
+        cv2 = _cv2()
+        # Convert BGR to RGB
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Grayscale, its 256-bin histogram and the histogram moments are shared by every downstream analysis stage
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        hist = self._gray_histogram(gray)
+        # Half-resolution working copy for whole-image colour statistics, taken before
+        # any further colour conversion so those run on a quarter of the pixels. Stride
+        # subsampling rather than area averaging: averaging pulls noisy chroma toward
+        # gray and would shift the photograph-likelihood score
+        h, w = image.shape[:2]
+        if min(h, w) >= self.downscale_min_side:
+            image_small = np.ascontiguousarray(image[::2, ::2])
+        else:
+            image_small = image
+        return {
+            'opencv_image': image,
+            'opencv_image_small': image_small,
+            'rgb_image': image_rgb,
+            'gray': gray,
+            'hist': hist,
+            'moments': self._image_moments(hist),
+            'height': image.shape[0],
+            'width': image.shape[1],
+            'channels': image.shape[2] if len(image.shape) > 2 else 1
+        }
+    
+    def _build_pil_image_data(self, img):
+        """Build the image_data dict for images only PIL could decode"""
+        img_array = np.array(img)
+        return {
+            'pil_image': img,
+            'array': img_array,
+            'height': img.height,
+            'width': img.width,
+            'channels': len(img_array.shape) if len(img_array.shape) > 2 else 1
+        }
+    
+    def _gray_histogram(self, gray):
+        """Compute the 256-bin intensity histogram, on the GPU when available"""
+        cv2 = _cv2()
+        if self._use_cuda is None:
+            try:
+                self._use_cuda = cv2.cuda.getCudaEnabledDeviceCount() > 0
+            except (AttributeError, cv2.error):
+                self._use_cuda = False
+        if self._use_cuda:
+            try:
+                gpu_gray = cv2.cuda_GpuMat()
+                gpu_gray.upload(gray)
+                hist = cv2.cuda.calcHist(gpu_gray).download().ravel().astype(np.float64)
+                return hist
+            except cv2.error as e:
+                logger.warning(f"CUDA histogram failed, falling back to CPU: {e}")
+        return np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    
     def _detect_patterns(self, image_data):
         """Detect medical patterns in the image with improved heuristics"""
+        cv2 = _cv2()
         patterns = {
             'potential_masses': 0,
             'asymmetry_detected': False,
@@ -209,15 +489,15 @@ class EnhancedMedicalAnalyzer:
 
         try:
             if 'opencv_image' in image_data:
-                bgr = image_data['opencv_image']
+                gray = image_data['gray']
                 h, w = image_data['height'], image_data['width']
                 img_area = float(h * w)
 
                 # Detect non-diagnostic photograph (color + high saturation variance)
-                patterns['photograph_likelihood'] = self._estimate_photograph_likelihood(bgr)
+                patterns['photograph_likelihood'] = self._estimate_photograph_likelihood(image_data['opencv_image_small'])
 
                 # Preprocess for contour detection
-                proc = self._preprocess_for_contours(bgr)
+                proc = self._preprocess_for_contours(gray)
                 contours, _ = cv2.findContours(proc, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
                 # Filter contours by size, circularity, solidity
@@ -243,13 +523,12 @@ class EnhancedMedicalAnalyzer:
                 patterns['potential_masses'] = int(suspicious_contours)
 
                 # Asymmetry via flipped MSE difference on CLAHE-equalized grayscale
-                asym_score = self._compute_asymmetry_score(bgr)
+                asym_score = self._compute_asymmetry_score(gray)
                 if asym_score > 0.25:
                     patterns['asymmetry_detected'] = True
                     patterns['asymmetry_interpretation'] = 'Asymmetry detected between left and right halves'
 
                 # Texture via Laplacian variance and local std
-                gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
                 lap_var = cv2.Laplacian(gray, cv2.CV_64F).var()
                 local_std = gray.std()
                 if lap_var > 400 and local_std > 40:
@@ -279,20 +558,20 @@ class EnhancedMedicalAnalyzer:
 
         try:
             if 'opencv_image' in image_data:
-                bgr = image_data['opencv_image']
-                gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+                gray = image_data['gray']
                 h, w = gray.shape
 
                 # Intensity statistics
+                moments = image_data['moments']
                 features['intensity_statistics'] = {
-                    'mean': float(gray.mean()),
-                    'std': float(gray.std()),
-                    'min': int(gray.min()),
-                    'max': int(gray.max()),
+                    'mean': moments['mean'],
+                    'std': moments['std'],
+                    'min': moments['min'],
+                    'max': moments['max'],
                     'percentile_25': float(np.percentile(gray, 25)),
                     'percentile_75': float(np.percentile(gray, 75)),
-                    'skewness': self._calculate_skewness(gray),
-                    'kurtosis': self._calculate_kurtosis(gray)
+                    'skewness': moments['skewness'],
+                    'kurtosis': moments['kurtosis']
                 }
 
                 # Morphological features
@@ -312,24 +591,22 @@ class EnhancedMedicalAnalyzer:
 
         return features
 
-    def _calculate_skewness(self, image):
-        """Calculate skewness of image intensity distribution"""
-        mean = image.mean()
-        std = image.std()
-        if std == 0:
-            return 0.0
-        return float(np.mean(((image - mean) / std) ** 3))
-
-    def _calculate_kurtosis(self, image):
-        """Calculate kurtosis of image intensity distribution"""
-        mean = image.mean()
-        std = image.std()
-        if std == 0:
-            return 0.0
-        return float(np.mean(((image - mean) / std) ** 4) - 3)
+    def _image_moments(self, hist):
+        """Calculate mean, std, min, max, skewness, kurtosis and entropy from a 256-bin intensity histogram"""
+        mean, std, skewness, kurtosis, entropy, lo, hi = _hist_stats_kernel()(hist)
+        return {
+            'mean': float(mean),
+            'std': float(std),
+            'min': int(lo),
+            'max': int(hi),
+            'skewness': float(skewness),
+            'kurtosis': float(kurtosis),
+            'entropy': float(entropy)
+        }
 
     def _extract_morphological_features(self, gray):
         """Extract morphological features using mathematical morphology"""
+        cv2 = _cv2()
         features = {}
         try:
             # Different structuring elements
@@ -343,8 +620,8 @@ class EnhancedMedicalAnalyzer:
             
             features['opening_variance'] = float(opening.var())
             features['closing_variance'] = float(closing.var())
-            features['gradient_mean'] = float(gradient.mean())
-            features['gradient_std'] = float(gradient.std())
+            features['gradient_mean'] = gradient.mean().item()
+            features['gradient_std'] = gradient.std().item()
             
         except Exception as e:
             logger.warning(f"Morphological feature extraction failed: {e}")
@@ -394,6 +671,7 @@ class EnhancedMedicalAnalyzer:
 
     def _calculate_gabor_responses(self, gray):
         """Calculate Gabor filter responses for texture analysis"""
+        cv2 = _cv2()
         try:
             responses = []
             for theta in [0, 45, 90, 135]:
@@ -406,6 +684,7 @@ class EnhancedMedicalAnalyzer:
 
     def _calculate_glcm_features(self, gray):
         """Calculate Gray Level Co-occurrence Matrix features"""
+        cv2 = _cv2()
         try:
             # Simplified GLCM calculation
             # Resize for computational efficiency
@@ -444,7 +723,7 @@ class EnhancedMedicalAnalyzer:
             quad3 = gray[h//2:, :w//2]
             quad4 = gray[h//2:, w//2:]
             
-            quadrant_means = [float(q.mean()) for q in [quad1, quad2, quad3, quad4]]
+            quadrant_means = [q.mean().item() for q in [quad1, quad2, quad3, quad4]]
             features['quadrant_variance'] = float(np.var(quadrant_means))
             features['quadrant_means'] = quadrant_means
             
@@ -456,8 +735,8 @@ class EnhancedMedicalAnalyzer:
             mask = (x - center_x) ** 2 + (y - center_y) ** 2 <= radius ** 2
             center_mask[mask] = 1
             
-            center_mean = float(gray[mask].mean() if mask.any() else 0)
-            periphery_mean = float(gray[~mask].mean() if (~mask).any() else 0)
+            center_mean = gray[mask].mean().item() if mask.any() else 0.0
+            periphery_mean = gray[~mask].mean().item() if (~mask).any() else 0.0
             features['center_periphery_ratio'] = center_mean / periphery_mean if periphery_mean > 0 else 1.0
             
         except Exception as e:
@@ -498,6 +777,7 @@ class EnhancedMedicalAnalyzer:
 
     def _detect_dark_regions(self, gray):
         """Detect dark regions that might represent ventricles or pathology"""
+        cv2 = _cv2()
         try:
             # Threshold for dark regions
             thresh = np.percentile(gray, 25)
@@ -522,6 +802,7 @@ class EnhancedMedicalAnalyzer:
 
     def _calculate_brain_symmetry(self, gray):
         """Calculate brain symmetry score"""
+        cv2 = _cv2()
         try:
             h, w = gray.shape
             left_half = gray[:, :w//2]
@@ -544,6 +825,7 @@ class EnhancedMedicalAnalyzer:
 
     def _analyze_lung_fields(self, gray):
         """Analyze lung field patterns"""
+        cv2 = _cv2()
         try:
             # Simple lung field detection using thresholding
             # Lung fields are typically darker regions
@@ -573,6 +855,7 @@ class EnhancedMedicalAnalyzer:
 
     def _detect_rib_patterns(self, gray):
         """Detect rib-like linear structures"""
+        cv2 = _cv2()
         try:
             # Use Hough line detection for rib structures
             edges = cv2.Canny(gray, 50, 150)
@@ -654,6 +937,7 @@ class EnhancedMedicalAnalyzer:
 
     def _detect_architectural_distortion(self, gray):
         """Detect architectural distortion patterns"""
+        cv2 = _cv2()
         try:
             # Use gradient analysis to detect distortion
             grad_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
@@ -662,7 +946,7 @@ class EnhancedMedicalAnalyzer:
             magnitude = np.sqrt(grad_x**2 + grad_y**2)
             
             # Look for convergent patterns (simplified)
-            distortion_score = float(magnitude.std())
+            distortion_score = magnitude.std().item()
             
             return {
                 'distortion_present': distortion_score > 50,
@@ -673,6 +957,7 @@ class EnhancedMedicalAnalyzer:
 
     def _analyze_bone_structures(self, gray):
         """Analyze bone structures in extremity images"""
+        cv2 = _cv2()
         try:
             # Bones appear as high-intensity structures
             bone_thresh = np.percentile(gray, 85)
@@ -701,6 +986,7 @@ class EnhancedMedicalAnalyzer:
 
     def _assess_cortical_continuity(self, bone_mask):
         """Assess cortical bone continuity"""
+        cv2 = _cv2()
         try:
             # Look for breaks in bone continuity using edge detection
             edges = cv2.Canny(bone_mask * 255, 50, 150)
@@ -719,6 +1005,7 @@ class EnhancedMedicalAnalyzer:
 
     def _analyze_joint_spaces(self, gray):
         """Analyze joint space characteristics"""
+        cv2 = _cv2()
         try:
             # Joint spaces appear as dark lines between bones
             # Use line detection to find potential joint spaces
@@ -745,14 +1032,14 @@ class EnhancedMedicalAnalyzer:
         """Estimate likelihood scores (0-100) for tumor, hemorrhage, and fracture with simple CV heuristics.
         Returns (scores_dict, evidence_dict).
         """
+        cv2 = _cv2()
         scores = {"tumor": 0.0, "hemorrhage": 0.0, "fracture": 0.0}
         evidence = {"tumor": [], "hemorrhage": [], "fracture": []}
 
         try:
             if 'opencv_image' not in image_data:
                 return scores, evidence
-            bgr = image_data['opencv_image']
-            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+            gray = image_data['gray']
             h, w = gray.shape
 
             # Common pre-processing
@@ -791,7 +1078,7 @@ class EnhancedMedicalAnalyzer:
             edges = cv2.Canny(eq, 60, 160)
             lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=60, minLineLength=int(0.06 * min(h, w)), maxLineGap=6)
             line_count = 0 if lines is None else len(lines)
-            edge_density = float((edges > 0).mean())
+            edge_density = (edges > 0).mean().item()
             frac_score = 0.0
             if line_count >= 4:
                 frac_score += min(40 + (line_count - 4) * 4.0, 55.0)
@@ -889,7 +1176,7 @@ class EnhancedMedicalAnalyzer:
                 # Use local variance map to find patches with high variability
                 blur = cv2.GaussianBlur(eq, (0, 0), sigmaX=1.2)
                 var_map = (eq.astype(np.float32) - blur.astype(np.float32)) ** 2
-                var_score = float(var_map.mean())
+                var_score = var_map.mean().item()
                 if var_score > 450.0 and not (scores['hemorrhage'] >= 35):
                     scores['tumor'] = float(np.clip(scores['tumor'] + 16.0, 0.0, 100.0))
                     evidence["tumor"].append("High intraparenchymal heterogeneity without hyperdense pattern")
@@ -904,9 +1191,9 @@ class EnhancedMedicalAnalyzer:
 
         return scores, evidence
 
-    def _preprocess_for_contours(self, bgr: np.ndarray) -> np.ndarray:
+    def _preprocess_for_contours(self, gray: np.ndarray) -> np.ndarray:
         """Contrast enhance + blur + adaptive threshold + morphology to isolate regions"""
-        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        cv2 = _cv2()
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
         eq = clahe.apply(gray)
         blur = cv2.GaussianBlur(eq, (5, 5), 0)
@@ -920,9 +1207,9 @@ class EnhancedMedicalAnalyzer:
         closed = cv2.morphologyEx(opened, cv2.MORPH_CLOSE, kernel, iterations=2)
         return closed
 
-    def _compute_asymmetry_score(self, bgr: np.ndarray) -> float:
+    def _compute_asymmetry_score(self, gray: np.ndarray) -> float:
         """Compute asymmetry as normalized MSE between halves after alignment"""
-        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        cv2 = _cv2()
         h, w = gray.shape
         left = gray[:, : w // 2]
         right = gray[:, w - (w // 2):]
@@ -937,6 +1224,7 @@ class EnhancedMedicalAnalyzer:
 
     def _estimate_photograph_likelihood(self, bgr: np.ndarray) -> float:
         """Estimate if the image is a color photograph (non-diagnostic)"""
+        cv2 = _cv2()
         hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
         sat = hsv[:, :, 1].astype(np.float32)
         sat_mean = sat.mean()
@@ -1800,6 +2088,7 @@ class EnhancedMedicalAnalyzer:
     
     def _assess_image_quality_enhanced(self, image_data):
         """Enhanced assessment of image quality with quantitative metrics"""
+        cv2 = _cv2()
         quality_ratings = {
             "overall_rating": "Good",
             "sharpness_rating": "Good",
@@ -1813,7 +2102,7 @@ class EnhancedMedicalAnalyzer:
         
         try:
             if 'opencv_image' in image_data:
-                gray = cv2.cvtColor(image_data['opencv_image'], cv2.COLOR_BGR2GRAY)
+                gray = image_data['gray']
                 
                 # Sharpness assessment using Laplacian variance
                 laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
@@ -1829,11 +2118,12 @@ class EnhancedMedicalAnalyzer:
                     quality_ratings["recommended_improvements"].append("Improve image focus")
                 
                 # Contrast assessment with histogram analysis
-                hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-                hist_norm = hist.flatten() / np.sum(hist)
+                hist = image_data['hist']
+                moments = image_data['moments']
+                hist_norm = hist / hist.sum()
                 cumulative_dist = np.cumsum(hist_norm)
                 contrast_range = np.where(cumulative_dist > 0.95)[0][0] - np.where(cumulative_dist > 0.05)[0][0]
-                contrast = gray.std()
+                contrast = moments['std']
                 quality_ratings["contrast_value"] = float(contrast)
                 
                 if contrast > 50 and contrast_range > 150:
@@ -1850,7 +2140,7 @@ class EnhancedMedicalAnalyzer:
                 noise = np.mean(np.abs(cv2.medianBlur(gray, 3) - gray))
                 snr = 0
                 if noise > 0:
-                    snr = gray.mean() / noise
+                    snr = moments['mean'] / noise
                 quality_ratings["noise_value"] = float(noise)
                 quality_ratings["signal_to_noise_ratio"] = float(snr)
                 
@@ -1871,12 +2161,12 @@ class EnhancedMedicalAnalyzer:
                     quality_ratings["recommended_improvements"].append("Minimize patient movement")
                     
                 # Check for overexposure
-                if self._detect_overexposure(gray):
+                if self._detect_overexposure(hist):
                     quality_ratings["artifacts"].append("Overexposure")
                     quality_ratings["recommended_improvements"].append("Reduce exposure settings")
                     
                 # Check for underexposure
-                if self._detect_underexposure(gray):
+                if self._detect_underexposure(hist):
                     quality_ratings["artifacts"].append("Underexposure")
                     quality_ratings["recommended_improvements"].append("Increase exposure settings")
                 
@@ -1940,16 +2230,16 @@ class EnhancedMedicalAnalyzer:
         except Exception:
             return False
     
-    def _detect_overexposure(self, gray):
-        """Detect overexposure artifacts"""
-        # Check if significant portion is very bright
-        high_intensity_ratio = np.sum(gray > 240) / float(gray.size)
+    def _detect_overexposure(self, hist):
+        """Detect overexposure artifacts from the intensity histogram"""
+        # Check if significant portion is very bright (> 240)
+        high_intensity_ratio = hist[241:].sum() / hist.sum()
         return high_intensity_ratio > 0.15
     
-    def _detect_underexposure(self, gray):
-        """Detect underexposure artifacts"""
-        # Check if significant portion is very dark
-        low_intensity_ratio = np.sum(gray < 30) / float(gray.size)
+    def _detect_underexposure(self, hist):
+        """Detect underexposure artifacts from the intensity histogram"""
+        # Check if significant portion is very dark (< 30)
+        low_intensity_ratio = hist[:30].sum() / hist.sum()
         return low_intensity_ratio > 0.4
     
     def _generate_technical_details(self, image_data, patterns):
@@ -1980,16 +2270,17 @@ class EnhancedMedicalAnalyzer:
         try:
             # Enhanced image statistics
             if 'opencv_image' in image_data:
-                gray = cv2.cvtColor(image_data['opencv_image'], cv2.COLOR_BGR2GRAY)
+                hist = image_data['hist']
+                moments = image_data['moments']
                 tech_details["image_statistics"] = {
-                    "mean_intensity": float(gray.mean()),
-                    "intensity_std_dev": float(gray.std()),
-                    "min_intensity": int(gray.min()),
-                    "max_intensity": int(gray.max()),
-                    "dynamic_range": int(gray.max() - gray.min()),
-                    "histogram_entropy": float(self._calculate_histogram_entropy(gray)),
-                    "intensity_skewness": float(self._calculate_skewness(gray)),
-                    "intensity_kurtosis": float(self._calculate_kurtosis(gray))
+                    "mean_intensity": moments['mean'],
+                    "intensity_std_dev": moments['std'],
+                    "min_intensity": moments['min'],
+                    "max_intensity": moments['max'],
+                    "dynamic_range": moments['max'] - moments['min'],
+                    "histogram_entropy": moments['entropy'],
+                    "intensity_skewness": moments['skewness'],
+                    "intensity_kurtosis": moments['kurtosis']
                 }
                 
             # Add algorithmic parameters
@@ -2035,17 +2326,6 @@ class EnhancedMedicalAnalyzer:
             
         return tech_details
         
-    def _calculate_histogram_entropy(self, gray):
-        """Calculate entropy of the histogram as a measure of information content"""
-        try:
-            hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-            hist = hist.flatten() / hist.sum()
-            # Remove zeros to avoid log(0)
-            hist = hist[hist > 0]
-            return -np.sum(hist * np.log2(hist))
-        except:
-            return 0.0
-            
     def _calculate_confidence_metrics(self, classification, quality, advanced_features):
         """Calculate confidence metrics for the analysis"""
         confidence_metrics = {
@@ -2062,8 +2342,7 @@ class EnhancedMedicalAnalyzer:
             quality_score = quality.get('quality_score', 0.75)
             
             # Map confidence level to numeric score
-            confidence_map = {"LOW": 0.4, "MODERATE": 0.7, "HIGH": 0.9}
-            classification_confidence = confidence_map.get(confidence_level, 0.7)
+            classification_confidence = _CONFIDENCE_MAP.get(confidence_level, 0.7)
             
             # Calculate overall confidence as weighted combination
             overall_confidence = 0.5 * classification_confidence + 0.5 * quality_score
@@ -2104,25 +2383,17 @@ class EnhancedMedicalAnalyzer:
     
     def _generate_medical_report(self, filename, body_part, classification, patterns, recommendations, quality, technical):
         """Generate a formatted medical report"""
-        report_lines = []
-        report_lines.append("=" * 60)
-        report_lines.append("DARKMED AI - MEDICAL IMAGE ANALYSIS REPORT")
-        report_lines.append("=" * 60)
-        report_lines.append("")
+        report_lines = [_REPORT_HEADER]
         
         # Patient Information
-        report_lines.append("PATIENT INFORMATION:")
-        report_lines.append(f"File: {filename}")
-        report_lines.append(f"Body Part: {body_part.upper()}")
-        report_lines.append(f"Analysis Date: {classification.get('analysis_timestamp', '2024-01-15')}")
-        report_lines.append("")
+        report_lines.append(_PATIENT_TMPL.format(
+            filename=filename,
+            body_part=body_part.upper(),
+            analysis_date=classification.get('analysis_timestamp', '2024-01-15')
+        ))
         
         # Medical Classification
-        report_lines.append("MEDICAL CLASSIFICATION:")
-        report_lines.append(f"Condition: {classification['condition']}")
-        report_lines.append(f"Risk Level: {classification['risk_level']}")
-        report_lines.append(f"Urgency: {classification['urgency']}")
-        report_lines.append(f"Risk Score: {classification['risk_score']}/100")
+        report_lines.append(_CLASSIFICATION_TMPL.format_map(classification))
         if classification.get('top_condition'):
             report_lines.append(f"Primary Concern: {classification['top_condition'].upper()}")
         if classification.get('condition_scores'):
@@ -2131,265 +2402,178 @@ class EnhancedMedicalAnalyzer:
         report_lines.append("")
         
         # Medical Findings
-        report_lines.append("MEDICAL FINDINGS:")
-        report_lines.append(f"Potential Masses/Lesions: {patterns.get('potential_masses', 0)}")
-        report_lines.append(f"Asymmetry: {'Yes' if patterns.get('asymmetry_detected', False) else 'No'}")
-        report_lines.append(f"Asymmetry Details: {patterns.get('asymmetry_interpretation', 'N/A')}")
-        report_lines.append(f"Texture Variations: {patterns.get('texture_variations', 'N/A')}")
-        report_lines.append(f"Contour Analysis: {patterns.get('contour_analysis', 'N/A')}")
+        report_lines.append(self._format_findings(patterns))
         # Evidence details
         cond_evidence = patterns.get('condition_evidence', {})
-        if any(cond_evidence.get(k) for k in ['tumor','hemorrhage','fracture']):
+        present = [(k, ev_list) for k in _CONDITION_EVIDENCE_KEYS if (ev_list := cond_evidence.get(k))]
+        if present:
             report_lines.append("")
             report_lines.append("Condition Evidence:")
-            for k in ['tumor','hemorrhage','fracture']:
-                ev_list = cond_evidence.get(k, [])
-                if ev_list:
-                    report_lines.append(f"- {k.capitalize()}: " + "; ".join(ev_list))
+            report_lines.extend(f"- {k.capitalize()}: " + "; ".join(ev_list) for k, ev_list in present)
         report_lines.append("")
         
         # Doctor Recommendations
         report_lines.append("CLINICAL RECOMMENDATIONS:")
-        if recommendations.get('risk_based_recommendations'):
-            report_lines.append("Risk-Based Actions:")
-            for rec in recommendations['risk_based_recommendations']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
-        
-        if recommendations.get('medical_recommendations'):
-            report_lines.append("Medical Actions:")
-            for rec in recommendations['medical_recommendations']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
-        
-        if recommendations.get('general_recommendations'):
-            report_lines.append("General Actions:")
-            for rec in recommendations['general_recommendations']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
+        for key, label in _REPORT_RECOMMENDATION_SECTIONS:
+            if recommendations.get(key):
+                report_lines.append(f"{label}:")
+                report_lines.append(_bullet_lines(recommendations[key]))
+                report_lines.append("")
         
         # Quality Assessment
-        report_lines.append("IMAGE QUALITY ASSESSMENT:")
-        report_lines.append(f"Overall Rating: {quality.get('overall_rating', 'N/A')}")
-        report_lines.append(f"Sharpness: {quality.get('sharpness_rating', 'N/A')}")
-        report_lines.append(f"Contrast: {quality.get('contrast_rating', 'N/A')}")
-        report_lines.append(f"Noise Level: {quality.get('noise_rating', 'N/A')}")
-        report_lines.append("")
+        report_lines.append(_QUALITY_TMPL.format_map(_ReportFields(quality)))
         
         # Technical Details
-        report_lines.append("TECHNICAL DETAILS:")
-        report_lines.append(f"Image Dimensions: {technical.get('image_dimensions', 'N/A')}")
-        report_lines.append(f"Analysis Algorithm: {technical.get('analysis_algorithm', 'N/A')}")
-        report_lines.append(f"Confidence Score: {technical.get('confidence_score', 'N/A')}")
-        report_lines.append("")
+        report_lines.append(_TECHNICAL_TMPL.format_map(_ReportFields(technical)))
         
         # Disclaimer
-        report_lines.append("DISCLAIMER:")
-        report_lines.append("This is a preliminary AI-assisted analysis for licensed clinicians only.")
-        report_lines.append("This is not a diagnosis and should not replace professional medical judgment.")
-        report_lines.append("Always consult with qualified healthcare providers for proper diagnosis and treatment.")
+        report_lines.append(_DISCLAIMER)
         report_lines.append("")
-        report_lines.append("=" * 60)
+        report_lines.append(_SEP60)
         
         return "\n".join(report_lines)
         
     def _generate_medical_report_enhanced(self, filename, body_part, classification, patterns, 
                                         recommendations, quality, technical, risk_assessment, advanced_features):
         """Generate an enhanced formatted medical report with comprehensive risk assessment"""
-        report_lines = []
-        report_lines.append("=" * 80)
-        report_lines.append("MEDSCOPE-AI - ENHANCED MEDICAL IMAGE ANALYSIS REPORT")
-        report_lines.append("=" * 80)
-        report_lines.append("")
+        # Resolve nested sections once up front
+        overall_risk = risk_assessment.get('overall_risk') or {}
+        specific_risks = risk_assessment.get('specific_risks') or {}
+        clinical_sig = risk_assessment.get('clinical_significance') or {}
+        followup = risk_assessment.get('follow_up_requirements') or {}
+        differentials = risk_assessment.get('differential_diagnosis') or []
+        secondary_conditions = classification.get('secondary_conditions')
+        condition_scores = classification.get('condition_scores')
+        contributing_factors = classification.get('contributing_factors')
+        confidence_level = classification.get('confidence_level', 'MODERATE')
+        
+        report_lines = [_ENHANCED_REPORT_HEADER]
         
         # Patient Information
-        report_lines.append("PATIENT INFORMATION:")
-        report_lines.append(f"File: {filename}")
-        report_lines.append(f"Body Part: {body_part.upper()}")
-        report_lines.append(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-        report_lines.append("")
+        report_lines.append(_PATIENT_TMPL.format(
+            filename=filename,
+            body_part=body_part.upper(),
+            analysis_date=datetime.now().strftime('%Y-%m-%d %H:%M')
+        ))
         
         # Enhanced Medical Classification
-        report_lines.append("MEDICAL CLASSIFICATION:")
-        report_lines.append(f"Primary Condition: {classification['primary_condition']}")
-        if classification.get('secondary_conditions'):
-            report_lines.append(f"Secondary Conditions: {', '.join(classification['secondary_conditions'])}")
-        report_lines.append(f"Risk Level: {classification['risk_level']}")
-        report_lines.append(f"Risk Score: {classification['risk_score']}/100")
-        report_lines.append(f"Urgency: {classification['urgency']}")
-        report_lines.append(f"Confidence Level: {classification.get('confidence_level', 'MODERATE')}")
-        
-        if classification.get('condition_scores'):
-            cs = classification['condition_scores']
+        report_lines.append(f"MEDICAL CLASSIFICATION:\nPrimary Condition: {classification['primary_condition']}")
+        if secondary_conditions:
+            report_lines.append(f"Secondary Conditions: {', '.join(secondary_conditions)}")
+        report_lines.append(_ENHANCED_CLASSIFICATION_TMPL.format(
+            risk_level=classification['risk_level'],
+            risk_score=classification['risk_score'],
+            urgency=classification['urgency'],
+            confidence_level=confidence_level
+        ))
+        
+        if condition_scores:
             report_lines.append("\nCondition Likelihood Scores (0-100):")
-            for condition, score in cs.items():
-                report_lines.append(f"  • {condition.capitalize()}: {score}")
+            report_lines.append(_bullet_lines(f"{condition.capitalize()}: {score}" for condition, score in condition_scores.items()))
         
-        if classification.get('contributing_factors'):
+        if contributing_factors:
             report_lines.append("\nContributing Factors:")
-            for factor in classification.get('contributing_factors', []):
-                report_lines.append(f"  • {factor}")
+            report_lines.append(_bullet_lines(contributing_factors))
         report_lines.append("")
         
         # Risk Assessment Section (new)
-        report_lines.append("COMPREHENSIVE RISK ASSESSMENT:")
-        overall_risk = risk_assessment.get('overall_risk', {})
-        report_lines.append(f"Risk Category: {overall_risk.get('risk_category', 'UNKNOWN')}")
-        report_lines.append(f"Urgency Level: {overall_risk.get('urgency_level', 'ROUTINE')}")
-        
-        specific_risks = risk_assessment.get('specific_risks', {})
-        if specific_risks.get('immediate_risks'):
-            report_lines.append("\nImmediate Risks:")
-            for risk in specific_risks.get('immediate_risks', []):
-                report_lines.append(f"  • {risk}")
-                
-        if specific_risks.get('short_term_risks'):
-            report_lines.append("\nShort-term Risks:")
-            for risk in specific_risks.get('short_term_risks', []):
-                report_lines.append(f"  • {risk}")
-                
-        if specific_risks.get('long_term_risks'):
-            report_lines.append("\nLong-term Risks:")
-            for risk in specific_risks.get('long_term_risks', []):
-                report_lines.append(f"  • {risk}")
+        report_lines.append(_RISK_TMPL.format(
+            risk_category=overall_risk.get('risk_category', 'UNKNOWN'),
+            urgency_level=overall_risk.get('urgency_level', 'ROUTINE')
+        ))
+        
+        for key, label in _REPORT_RISK_SECTIONS:
+            risks = specific_risks.get(key)
+            if risks:
+                report_lines.append(f"\n{label}:")
+                report_lines.append(_bullet_lines(risks))
         
         # Clinical Significance (new)
-        clinical_sig = risk_assessment.get('clinical_significance', {})
         if clinical_sig:
-            report_lines.append("\nClinical Significance:")
-            report_lines.append(f"  • Clinical Impact: {clinical_sig.get('clinical_impact', 'UNKNOWN')}")
-            report_lines.append(f"  • Treatment Urgency: {clinical_sig.get('treatment_urgency', 'ROUTINE')}")
-            report_lines.append(f"  • Prognosis Impact: {clinical_sig.get('prognosis_impact', 'MINIMAL')}")
+            report_lines.append(_CLINICAL_SIGNIFICANCE_TMPL.format(
+                clinical_impact=clinical_sig.get('clinical_impact', 'UNKNOWN'),
+                treatment_urgency=clinical_sig.get('treatment_urgency', 'ROUTINE'),
+                prognosis_impact=clinical_sig.get('prognosis_impact', 'MINIMAL')
+            ))
         report_lines.append("")
         
         # Medical Findings
-        report_lines.append("MEDICAL FINDINGS:")
-        report_lines.append(f"Potential Masses/Lesions: {patterns.get('potential_masses', 0)}")
-        report_lines.append(f"Asymmetry: {'Yes' if patterns.get('asymmetry_detected', False) else 'No'}")
-        report_lines.append(f"Asymmetry Details: {patterns.get('asymmetry_interpretation', 'N/A')}")
-        report_lines.append(f"Texture Variations: {patterns.get('texture_variations', 'N/A')}")
-        report_lines.append(f"Contour Analysis: {patterns.get('contour_analysis', 'N/A')}")
+        report_lines.append(self._format_findings(patterns))
         
         # Evidence details
         cond_evidence = patterns.get('condition_evidence', {})
-        if any(cond_evidence.get(k) for k in ['tumor', 'hemorrhage', 'fracture']):
+        present = [(k, ev_list) for k in _CONDITION_EVIDENCE_KEYS if (ev_list := cond_evidence.get(k))]
+        if present:
             report_lines.append("\nCondition Evidence:")
-            for k in ['tumor', 'hemorrhage', 'fracture']:
-                ev_list = cond_evidence.get(k, [])
-                if ev_list:
-                    report_lines.append(f"  • {k.capitalize()}: " + "; ".join(ev_list))
+            report_lines.extend(f"  • {k.capitalize()}: " + "; ".join(ev_list) for k, ev_list in present)
         report_lines.append("")
         
         # Differential Diagnosis (new)
-        differentials = risk_assessment.get('differential_diagnosis', [])
         if differentials:
             report_lines.append("DIFFERENTIAL DIAGNOSIS:")
-            for diff in differentials:
-                report_lines.append(f"  • {diff}")
+            report_lines.append(_bullet_lines(differentials))
             report_lines.append("")
         
         # Enhanced Doctor Recommendations
         report_lines.append("CLINICAL RECOMMENDATIONS:")
-        
-        # Urgency-based actions (new)
-        if recommendations.get('urgency_based_actions'):
-            report_lines.append("Urgency-Based Actions:")
-            for rec in recommendations['urgency_based_actions']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
-        
-        # Risk-based recommendations
-        if recommendations.get('risk_based_recommendations'):
-            report_lines.append("Risk-Based Recommendations:")
-            for rec in recommendations['risk_based_recommendations']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
-        
-        # Medical recommendations
-        if recommendations.get('medical_recommendations'):
-            report_lines.append("Medical Recommendations:")
-            for rec in recommendations['medical_recommendations']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
-        
-        # Patient management (new)
-        if recommendations.get('patient_management'):
-            report_lines.append("Patient Management:")
-            for rec in recommendations['patient_management']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
-            
-        # Specialist consultations (new)
-        if recommendations.get('specialist_consultations'):
-            report_lines.append("Specialist Consultations:")
-            for rec in recommendations['specialist_consultations']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
-            
-        # Imaging recommendations (new)
-        if recommendations.get('imaging_recommendations'):
-            report_lines.append("Imaging Recommendations:")
-            for rec in recommendations['imaging_recommendations']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
-            
-        # Monitoring recommendations (new)
-        if recommendations.get('monitoring_recommendations'):
-            report_lines.append("Monitoring Recommendations:")
-            for rec in recommendations['monitoring_recommendations']:
-                report_lines.append(f"  • {rec}")
-            report_lines.append("")
+        for key, label in _ENHANCED_REPORT_RECOMMENDATION_SECTIONS:
+            recs = recommendations.get(key)
+            if recs:
+                report_lines.append(f"{label}:")
+                report_lines.append(_bullet_lines(recs))
+                report_lines.append("")
         
         # Follow-up Requirements (new)
-        followup = risk_assessment.get('follow_up_requirements', {})
         if followup:
+            timeline = followup.get('timeline')
+            imaging_followup = followup.get('imaging_followup')
+            specialist_referrals = followup.get('specialist_referrals')
+            monitoring_parameters = followup.get('monitoring_parameters')
             report_lines.append("FOLLOW-UP REQUIREMENTS:")
             
-            if followup.get('timeline'):
-                timeline = followup.get('timeline', {})
+            if timeline:
                 report_lines.append("Timeline:")
-                for key, value in timeline.items():
-                    report_lines.append(f"  • {key.replace('_', ' ').title()}: {value}")
+                report_lines.append(_bullet_lines(f"{key.replace('_', ' ').title()}: {value}" for key, value in timeline.items()))
                 report_lines.append("")
                 
-            if followup.get('imaging_followup'):
-                report_lines.append(f"Imaging Follow-up: {followup.get('imaging_followup')}")
+            if imaging_followup:
+                report_lines.append(f"Imaging Follow-up: {imaging_followup}")
                 
-            if followup.get('specialist_referrals'):
-                report_lines.append("Specialist Referrals: " + ", ".join(followup.get('specialist_referrals', [])))
+            if specialist_referrals:
+                report_lines.append("Specialist Referrals: " + ", ".join(specialist_referrals))
                 
-            if followup.get('monitoring_parameters'):
+            if monitoring_parameters:
                 report_lines.append("\nMonitoring Parameters:")
-                for param in followup.get('monitoring_parameters', []):
-                    report_lines.append(f"  • {param}")
+                report_lines.append(_bullet_lines(monitoring_parameters))
                     
             report_lines.append("")
         
         # Quality Assessment
-        report_lines.append("IMAGE QUALITY ASSESSMENT:")
-        report_lines.append(f"Overall Rating: {quality.get('overall_rating', 'N/A')}")
-        report_lines.append(f"Sharpness: {quality.get('sharpness_rating', 'N/A')}")
-        report_lines.append(f"Contrast: {quality.get('contrast_rating', 'N/A')}")
-        report_lines.append(f"Noise Level: {quality.get('noise_rating', 'N/A')}")
-        report_lines.append("")
+        report_lines.append(_QUALITY_TMPL.format_map(_ReportFields(quality)))
         
         # Technical Details
-        report_lines.append("TECHNICAL DETAILS:")
-        report_lines.append(f"Image Dimensions: {technical.get('image_dimensions', 'N/A')}")
-        report_lines.append(f"Analysis Algorithm: Enhanced Deep Tissue Analysis v2.0")
-        report_lines.append(f"Confidence Metrics: {classification.get('confidence_level', 'MODERATE')}")
-        report_lines.append("")
+        report_lines.append(_ENHANCED_TECHNICAL_TMPL.format(
+            image_dimensions=technical.get('image_dimensions', 'N/A'),
+            confidence_level=confidence_level
+        ))
         
         # Disclaimer
-        report_lines.append("DISCLAIMER:")
-        report_lines.append("This is a preliminary AI-assisted analysis for licensed clinicians only.")
-        report_lines.append("This is not a diagnosis and should not replace professional medical judgment.")
-        report_lines.append("Always consult with qualified healthcare providers for proper diagnosis and treatment.")
+        report_lines.append(_DISCLAIMER)
         report_lines.append("")
-        report_lines.append("=" * 80)
+        report_lines.append(_SEP80)
         
         return "\n".join(report_lines)
     
+    def _format_findings(self, patterns):
+        """Render the shared MEDICAL FINDINGS block of the text reports"""
+        return _FINDINGS_TMPL.format(
+            potential_masses=patterns.get('potential_masses', 0),
+            asymmetry='Yes' if patterns.get('asymmetry_detected', False) else 'No',
+            asymmetry_interpretation=patterns.get('asymmetry_interpretation', 'N/A'),
+            texture_variations=patterns.get('texture_variations', 'N/A'),
+            contour_analysis=patterns.get('contour_analysis', 'N/A')
+        )
+    
     def _create_error_analysis(self, filename, error_message):
         """Create error analysis when image processing fails"""
         return {
@@ -2436,6 +2620,90 @@ class EnhancedMedicalAnalyzer:
 # Initialize analyzer and recommendation engine
 analyzer = EnhancedMedicalAnalyzer()
 recommendation_engine = MedicalRecommendationEngine()
+_VALID_BODY_PARTS = frozenset(analyzer.BODY_PARTS)
+
+# Uploads are streamed to disk in chunks of this size to bound memory use
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+class _WorkerPool:
+    """Process pool that replaces itself when a worker dies.
+    A crashed worker (OOM, a segfault in native code) leaves a ProcessPoolExecutor broken for
+    good, so a call that hits BrokenProcessPool swaps in a fresh executor and is retried once.
+    Only used from the event loop, so the swap needs no locking.
+    """
+    def __init__(self, max_workers: int, initializer=None):
+        self._max_workers = max_workers
+        self._initializer = initializer
+        self._executor = self._new_executor()
+    
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self._max_workers, initializer=self._initializer)
+    
+    async def run(self, fn, *args):
+        """Run fn(*args) in a worker process"""
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # Concurrent calls on the same broken executor replace it only once
+            if self._executor is executor:
+                logger.warning(f"Worker pool for {fn.__name__} broke, starting a new one")
+                self._executor = self._new_executor()
+                executor.shutdown(wait=False)
+            return await loop.run_in_executor(self._executor, fn, *args)
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+# The analysis and PDF pools share one worker budget of a process per CPU
+_CPU_COUNT = os.cpu_count() or 1
+_PDF_WORKERS = min(4, max(1, _CPU_COUNT // 4))
+_ANALYSIS_WORKERS = max(1, _CPU_COUNT - _PDF_WORKERS)
+
+# Image analysis is CPU-bound and largely pure-Python (texture loops hold the GIL),
+# so uploads are analyzed in worker processes rather than on the event loop
+_analysis_pool = _WorkerPool(_ANALYSIS_WORKERS)
+
+@app.on_event("shutdown")
+def shutdown_analysis_pool():
+    _analysis_pool.shutdown()
+
+def _analyze_image_bytes(data: bytes, filename: str, body_part: str):
+    """Analyze an encoded image with the module-level analyzer (runs in a worker process)"""
+    return analyzer.analyze_image_bytes(data, filename, body_part)
+
+# Recent image analyses keyed by (content digest, filename, body part) so that
+# re-uploads of the same image skip the pipeline. Only touched from the event loop.
+_ANALYSIS_CACHE_SIZE = 128
+_analysis_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+def _analysis_cache_key(content: bytes, filename: str, body_part: str) -> tuple:
+    """Build the analysis cache key; BLAKE2b keeps hashing cheap next to the analysis itself"""
+    return hashlib.blake2b(content, digest_size=16).digest(), filename, body_part
+
+def _lru_get(cache: OrderedDict, key):
+    """Return a cached value and mark it most recently used, or None"""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+def _lru_put(cache: OrderedDict, key, value, max_size: int):
+    """Cache a value, evicting the least recently used entry when full"""
+    cache[key] = value
+    if len(cache) > max_size:
+        cache.popitem(last=False)
+
+def _get_cached_analysis(key: tuple):
+    """Return a cached analysis and mark it most recently used, or None"""
+    return _lru_get(_analysis_cache, key)
+
+def _store_cached_analysis(key: tuple, result: dict):
+    """Cache a successful analysis, evicting the least recently used entry when full"""
+    if result.get("medical_classification", {}).get("condition") == "ANALYSIS_ERROR":
+        return
+    _lru_put(_analysis_cache, key, result, _ANALYSIS_CACHE_SIZE)
 
 # Helper functions
 def save_temp_file(file: UploadFile) -> str:
@@ -2444,26 +2712,22 @@ def save_temp_file(file: UploadFile) -> str:
     fd, tmp_path = tempfile.mkstemp(suffix=suffix)
     try:
         with os.fdopen(fd, "wb") as f:
-            f.write(file.file.read())
+            shutil.copyfileobj(file.file, f, _UPLOAD_CHUNK_SIZE)
         return tmp_path
     except Exception as e:
         logger.error(f"Error saving file: {e}")
         raise HTTPException(status_code=500, detail="Failed to save uploaded file")
 
+_EXT_TYPE = {
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.tiff': 'image', '.bmp': 'image', '.gif': 'image',
+    '.pdf': 'pdf',
+    '.dcm': 'dicom',
+    '.mp4': 'video', '.avi': 'video', '.mov': 'video', '.mkv': 'video',
+}
+
 def get_file_type(filename: str) -> str:
     """Determine file type based on extension"""
-    ext = Path(filename).suffix.lower()
-    
-    if ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif']:
-        return "image"
-    elif ext == '.pdf':
-        return "pdf"
-    elif ext == '.dcm':
-        return "dicom"
-    elif ext in ['.mp4', '.avi', '.mov', '.mkv']:
-        return "video"
-    else:
-        return "unknown"
+    return _EXT_TYPE.get(Path(filename).suffix.lower(), "unknown")
 
 @app.get("/")
 async def root():
@@ -2503,7 +2767,7 @@ async def analyze_files(
     """Analyze uploaded medical files with enhanced AI analysis"""
     
     # Validate body part
-    if body_part not in analyzer.BODY_PARTS:
+    if body_part not in _VALID_BODY_PARTS:
         raise HTTPException(status_code=400, detail=f"Invalid body part. Must be one of: {list(analyzer.BODY_PARTS.keys())}")
     
     if not files:
@@ -2514,55 +2778,59 @@ async def analyze_files(
     processed_files = 0
     failed_files = 0
     
-    for file in files:
-        try:
-            logger.info(f"Processing file: {file.filename} for body part: {body_part}")
-            
-            # Save file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_file:
-                content = await file.read()
-                temp_file.write(content)
-                temp_file_path = temp_file.name
-            
-            try:
-                # Determine file type
-                file_type = get_file_type(file.filename)
-                
-                if file_type in ["image"]:
-                    logger.info(f"Analyzing {body_part} image: {file.filename}")
-                    analysis_result = analyzer.analyze_image(temp_file_path, file.filename, body_part)
-                    logger.info(f"Enhanced analysis completed for: {file.filename}")
-                else:
-                    # For non-image files, provide basic analysis
-                    analysis_result = {
-                        "summary": f"File {file.filename} uploaded for {body_part} analysis",
-                        "note": f"File type {file_type} requires specialized analysis tools",
-                        "disclaimer": "This is a preliminary AI-assisted analysis for licensed clinicians only. This is not a diagnosis and should not replace professional medical judgment. Always consult with qualified healthcare providers for proper diagnosis and treatment.",
-                        "analysis_timestamp": "2024-01-15T10:30:00Z"
-                    }
-                
-                results.append({
-                    "filename": file.filename,
-                    "body_part": body_part,
-                    "file_type": file_type,
-                    "analysis": analysis_result
-                })
-                processed_files += 1
-                
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                    
-        except Exception as e:
-            logger.error(f"Failed to process {file.filename}: {str(e)}")
+    async def _analyze_one(file: UploadFile):
+        logger.info(f"Processing file: {file.filename} for body part: {body_part}")
+        
+        # Determine file type
+        file_type = get_file_type(file.filename)
+        
+        if file_type in ["image"]:
+            # Images are decoded straight from the uploaded bytes
+            content = await file.read()
+            cache_key = _analysis_cache_key(content, file.filename, body_part)
+            analysis_result = _get_cached_analysis(cache_key)
+            if analysis_result is not None:
+                logger.info(f"Reusing cached analysis for: {file.filename}")
+            else:
+                logger.info(f"Analyzing {body_part} image: {file.filename}")
+                analysis_result = await _analysis_pool.run(
+                    _analyze_image_bytes, content, file.filename, body_part
+                )
+                _store_cached_analysis(cache_key, analysis_result)
+                logger.info(f"Enhanced analysis completed for: {file.filename}")
+        else:
+            # For non-image files, provide basic analysis; the body is never read, and
+            # Starlette discards its spooled copy of the upload with the request
+            analysis_result = {
+                "summary": f"File {file.filename} uploaded for {body_part} analysis",
+                "note": f"File type {file_type} requires specialized analysis tools",
+                "disclaimer": "This is a preliminary AI-assisted analysis for licensed clinicians only. This is not a diagnosis and should not replace professional medical judgment. Always consult with qualified healthcare providers for proper diagnosis and treatment.",
+                "analysis_timestamp": "2024-01-15T10:30:00Z"
+            }
+        
+        return {
+            "filename": file.filename,
+            "body_part": body_part,
+            "file_type": file_type,
+            "analysis": analysis_result
+        }
+    
+    # Analyze all files concurrently; results keep the upload order
+    outcomes = await asyncio.gather(*(_analyze_one(file) for file in files), return_exceptions=True)
+    
+    for file, outcome in zip(files, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Failed to process {file.filename}: {str(outcome)}")
             results.append({
                 "filename": file.filename,
                 "body_part": body_part,
                 "file_type": "unknown",
-                "error": str(e)
+                "error": str(outcome)
             })
             failed_files += 1
+        else:
+            results.append(outcome)
+            processed_files += 1
     
     return {
         "body_part": body_part,
@@ -2572,6 +2840,498 @@ async def analyze_files(
         "reports": results
     }
 
+# PDF report styles are built once and shared by every request; ReportLab only
+# reads them while laying out the document
+_PDF_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_PDF_STYLES['Heading1'],
+    fontSize=20,
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    textColor=colors.darkblue
+)
+
+_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_PDF_STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=12,
+    spaceBefore=20,
+    textColor=colors.darkblue
+)
+
+_SUBHEADING_STYLE = ParagraphStyle(
+    'CustomSubheading',
+    parent=_PDF_STYLES['Heading3'],
+    fontSize=12,
+    spaceAfter=8,
+    spaceBefore=10,
+    textColor=colors.darkslateblue
+)
+
+_NORMAL_STYLE = _PDF_STYLES['Normal']
+
+# Load the metrics of the report fonts up front instead of on the first table cell
+for _font_name in ('Helvetica', 'Helvetica-Bold'):
+    pdfmetrics.getFont(_font_name)
+
+def _banner_table_style(header_color, body_color):
+    """Table style with a large bold white-on-colour header row"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header_color),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), body_color),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+_CLASSIFICATION_TBL_STYLE = _banner_table_style(colors.darkblue, colors.beige)
+_RISK_TBL_STYLE = _banner_table_style(colors.darkred, colors.mistyrose)
+_FINDINGS_TBL_STYLE = _banner_table_style(colors.darkgreen, colors.beige)
+_QUALITY_TBL_STYLE = _CLASSIFICATION_TBL_STYLE
+_TECH_TBL_STYLE = _banner_table_style(colors.grey, colors.beige)
+_CONFIDENCE_TBL_STYLE = _banner_table_style(colors.darkslateblue, colors.beige)
+
+_CONDITION_TBL_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+_CLINICAL_TBL_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightsteelblue),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+_TIMELINE_TBL_STYLE = _CLINICAL_TBL_STYLE
+
+def _parse_analysis_data(analysis_data: str):
+    """Decode the analysis JSON posted with a report request"""
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(analysis_data)
+        except orjson.JSONDecodeError:
+            # orjson is strict about NaN/Infinity, which json.dumps emits for float stats
+            pass
+    return json.loads(analysis_data)
+
+def _warm_up_pdf_worker():
+    """Build a throwaway document so a worker's first report does not pay ReportLab's one-off setup"""
+    try:
+        SimpleDocTemplate(_PDFSink(), pagesize=A4).build([Paragraph("MedScope-AI", _NORMAL_STYLE)])
+    except Exception as e:
+        # A failing initializer would break the pool, and warm-up is only an optimisation
+        logger.warning(f"PDF worker warm-up failed: {e}")
+
+# ReportLab layout is pure Python and holds the GIL, so reports are rendered in
+# worker processes, each warmed up as it starts. The semaphore bounds how many
+# payloads wait on the pool; it is created in the startup hook, inside the event loop.
+_pdf_pool = _WorkerPool(_PDF_WORKERS, initializer=_warm_up_pdf_worker)
+_PDF_RENDER_SEMAPHORE = None
+
+@app.on_event("startup")
+def create_pdf_render_semaphore():
+    global _PDF_RENDER_SEMAPHORE
+    _PDF_RENDER_SEMAPHORE = asyncio.Semaphore(_PDF_WORKERS)
+
+@app.on_event("shutdown")
+def shutdown_pdf_pool():
+    _pdf_pool.shutdown()
+
+# Key/value table rows of the PDF report as (label, key, default, formatter);
+# values without a formatter are placed in the cell as-is
+_CLASSIFICATION_FIELDS = (
+    ('Primary Condition', 'primary_condition', 'N/A', None),
+    ('Risk Level', 'risk_level', 'N/A', None),
+    ('Risk Score', 'risk_score', 0, '{}/100'.format),
+    ('Urgency', 'urgency', 'ROUTINE', None),
+    ('Confidence Level', 'confidence_level', 'MODERATE', None),
+)
+
+_OVERALL_RISK_FIELDS = (
+    ('Risk Category', 'risk_category', 'UNKNOWN', None),
+    ('Urgency Level', 'urgency_level', 'ROUTINE', None),
+)
+
+_CLINICAL_SIGNIFICANCE_FIELDS = (
+    ('Clinical Impact', 'clinical_impact', 'UNKNOWN', None),
+    ('Treatment Urgency', 'treatment_urgency', 'ROUTINE', None),
+    ('Prognosis Impact', 'prognosis_impact', 'MINIMAL', None),
+)
+
+_FINDINGS_FIELDS = (
+    ('Potential Masses/Lesions', 'potential_masses', 0, str),
+    ('Asymmetry', 'asymmetry_detected', False, lambda detected: 'Yes' if detected else 'No'),
+    ('Asymmetry Details', 'asymmetry_interpretation', 'N/A', None),
+    ('Texture Variations', 'texture_variations', 'N/A', None),
+    ('Contour Analysis', 'contour_analysis', 'N/A', None),
+)
+
+_QUALITY_FIELDS = (
+    ('Overall Rating', 'overall_rating', 'N/A', None),
+    ('Diagnostic Quality', 'diagnostic_quality', 'N/A', None),
+    ('Sharpness', 'sharpness_rating', 'N/A', None),
+    ('Contrast', 'contrast_rating', 'N/A', None),
+    ('Noise Level', 'noise_rating', 'N/A', None),
+)
+
+_TECHNICAL_FIELDS = (
+    ('Image Dimensions', 'image_dimensions', 'N/A', None),
+    ('Analysis Algorithm', 'analysis_algorithm', 'N/A', None),
+    ('Confidence Metrics', 'confidence_score', 'N/A', None),
+)
+
+_CONFIDENCE_FIELDS = (
+    ('Overall Confidence', 'overall_confidence', 'MODERATE', None),
+    ('Classification Confidence', 'classification_confidence', 0.7, '{:.2f}'.format),
+    ('Feature Extraction Confidence', 'feature_extraction_confidence', 0.8, '{:.2f}'.format),
+)
+
+def _kv_rows(data, fields):
+    """Build the [label, value] rows of a key/value table from a field spec"""
+    rows = []
+    for label, key, default, fmt in fields:
+        value = data.get(key, default)
+        rows.append([label, fmt(value) if fmt else value])
+    return rows
+
+def _kv_table(header, rows, style, col_widths=(2*inch, 3*inch)):
+    """Two-column table with a header row, laid out like every table in the PDF report"""
+    table = Table([list(header), *rows], colWidths=list(col_widths))
+    table.setStyle(style)
+    return table
+
+# Usable line width inside SimpleDocTemplate's frame on A4: one-inch margins
+# less the Frame's default 6pt left and right padding
+_PDF_TEXT_WIDTH = A4[0] - 2*inch - 12
+
+# Plain-text bullet rows set exactly like lines of a Normal paragraph
+_BULLET_TBL_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), _NORMAL_STYLE.fontName),
+    ('FONTSIZE', (0, 0), (-1, -1), _NORMAL_STYLE.fontSize),
+    ('LEADING', (0, 0), (-1, -1), _NORMAL_STYLE.leading),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('TOPPADDING', (0, 0), (-1, -1), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 0)
+])
+
+def _bullets(items):
+    """Render a bulleted list as a single flowable.
+    When every item fits on one line the list becomes a one-column Table of plain strings,
+    which ReportLab draws without its markup parser; longer lists are joined into one
+    escaped Paragraph so they still wrap.
+    """
+    lines = [f"• {item}" for item in items]
+    font_name, font_size = _NORMAL_STYLE.fontName, _NORMAL_STYLE.fontSize
+    if all(stringWidth(line, font_name, font_size) <= _PDF_TEXT_WIDTH for line in lines):
+        return Table([[line] for line in lines], style=_BULLET_TBL_STYLE, hAlign='LEFT')
+    return Paragraph("<br/>".join(escape(line) for line in lines), _NORMAL_STYLE)
+
+class _PDFSink:
+    """Write target for SimpleDocTemplate that keeps ReportLab's output without copying it.
+    ReportLab serialises the finished document in memory and hands it over in one write(),
+    so there is no incremental growth to pre-size a buffer for.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+        return len(data)
+
+    def getvalue(self) -> bytes:
+        # Joining a single bytes object returns it as-is
+        return b"".join(self._chunks)
+
+# Each _emit_* helper appends one section of the PDF report to the story. A section
+# present in the payload is rendered even when empty.
+
+def _emit_title(story, analysis, filename, body_part):
+    """Title with enhanced styling"""
+    story.append(Paragraph("MEDSCOPE-AI - ENHANCED MEDICAL IMAGE ANALYSIS REPORT", _TITLE_STYLE))
+    story.append(Spacer(1, 20))
+
+def _emit_patient_info(story, analysis, filename, body_part):
+    """Patient information; the render time is only looked up when the analysis has no timestamp"""
+    analysis_ts = analysis.get('analysis_timestamp')
+    if not analysis_ts:
+        analysis_ts = datetime.now().isoformat()
+    story.append(Paragraph("PATIENT INFORMATION", _HEADING_STYLE))
+    story.append(Paragraph("<br/>".join([
+        f"<b>File:</b> {escape(filename)}",
+        f"<b>Body Part:</b> {escape(body_part.upper())}",
+        f"<b>Analysis Date:</b> {escape(str(analysis_ts))}"
+    ]), _NORMAL_STYLE))
+    story.append(Spacer(1, 12))
+
+def _emit_classification(story, analysis, filename, body_part):
+    """Enhanced medical classification with condition scores and contributing factors"""
+    classification = analysis.get('medical_classification')
+    if classification is None:
+        return
+    story.append(Paragraph("MEDICAL CLASSIFICATION", _HEADING_STYLE))
+    
+    # More comprehensive classification table
+    classification_rows = _kv_rows(classification, _CLASSIFICATION_FIELDS)
+    
+    # Add secondary conditions if present
+    if secondary_conditions := classification.get('secondary_conditions'):
+        classification_rows.append(['Secondary Conditions', ', '.join(secondary_conditions)])
+        
+    story.append(_kv_table(('Attribute', 'Value'), classification_rows, _CLASSIFICATION_TBL_STYLE))
+    
+    # Add condition scores if present
+    if cs := classification.get('condition_scores'):
+        story.append(Spacer(1, 10))
+        story.append(Paragraph("Condition Likelihood Scores", _SUBHEADING_STYLE))
+        
+        condition_rows = [[condition.capitalize(), str(score)] for condition, score in cs.items()]
+        story.append(_kv_table(('Condition', 'Score (0-100)'), condition_rows, _CONDITION_TBL_STYLE))
+    
+    # Add contributing factors
+    if contributing_factors := classification.get('contributing_factors'):
+        story.append(Spacer(1, 10))
+        story.append(Paragraph("Contributing Factors", _SUBHEADING_STYLE))
+        story.append(_bullets(contributing_factors))
+    
+    story.append(Spacer(1, 12))
+
+def _emit_risk(story, analysis, filename, body_part):
+    """Comprehensive risk assessment: overall risk, specific risks and clinical significance"""
+    risk_assessment = analysis.get('risk_assessment')
+    if risk_assessment is None:
+        return
+    story.append(Paragraph("COMPREHENSIVE RISK ASSESSMENT", _HEADING_STYLE))
+    
+    # Overall risk
+    overall_risk = risk_assessment.get('overall_risk', {})
+    story.append(_kv_table(('Attribute', 'Value'), _kv_rows(overall_risk, _OVERALL_RISK_FIELDS), _RISK_TBL_STYLE))
+    
+    # Specific risks; every list but the last is followed by a small gap
+    specific_risks = risk_assessment.get('specific_risks', {})
+    if specific_risks:
+        story.append(Spacer(1, 10))
+        
+        for key, label in _REPORT_RISK_SECTIONS:
+            if risks := specific_risks.get(key):
+                story.append(Paragraph(label, _SUBHEADING_STYLE))
+                story.append(_bullets(risks))
+                if key != 'long_term_risks':
+                    story.append(Spacer(1, 6))
+    
+    # Clinical significance
+    clinical_sig = risk_assessment.get('clinical_significance', {})
+    if clinical_sig:
+        story.append(Spacer(1, 10))
+        story.append(Paragraph("Clinical Significance", _SUBHEADING_STYLE))
+        
+        story.append(_kv_table(('Attribute', 'Assessment'), _kv_rows(clinical_sig, _CLINICAL_SIGNIFICANCE_FIELDS), _CLINICAL_TBL_STYLE))
+    
+    story.append(Spacer(1, 12))
+
+def _emit_findings(story, analysis, filename, body_part):
+    """Medical findings table and per-condition evidence"""
+    findings = analysis.get('medical_findings')
+    if findings is None:
+        return
+    story.append(Paragraph("MEDICAL FINDINGS", _HEADING_STYLE))
+    
+    story.append(_kv_table(('Finding', 'Details'), _kv_rows(findings, _FINDINGS_FIELDS), _FINDINGS_TBL_STYLE))
+    
+    # Condition evidence
+    cond_evidence = findings.get('condition_evidence', {})
+    present = [(k, ev_list) for k in _CONDITION_EVIDENCE_KEYS if (ev_list := cond_evidence.get(k))]
+    if present:
+        story.append(Spacer(1, 10))
+        story.append(Paragraph("Condition Evidence", _SUBHEADING_STYLE))
+        
+        for k, ev_list in present:
+            story.append(Paragraph(f"<b>{k.capitalize()}:</b> " + escape("; ".join(ev_list)), _NORMAL_STYLE))
+            story.append(Spacer(1, 4))
+    
+    story.append(Spacer(1, 12))
+
+def _emit_differential(story, analysis, filename, body_part):
+    """Differential diagnosis from the risk assessment"""
+    risk_assessment = analysis.get('risk_assessment')
+    differentials = risk_assessment.get('differential_diagnosis') if risk_assessment is not None else None
+    if not differentials:
+        return
+    story.append(Paragraph("DIFFERENTIAL DIAGNOSIS", _HEADING_STYLE))
+    story.append(_bullets(differentials))
+    story.append(Spacer(1, 12))
+
+def _emit_recommendations(story, analysis, filename, body_part):
+    """Clinical recommendations; every list but the last is followed by a small gap"""
+    recommendations = analysis.get('doctor_recommendations')
+    if recommendations is None:
+        return
+    story.append(Paragraph("CLINICAL RECOMMENDATIONS", _HEADING_STYLE))
+    
+    for key, label in _ENHANCED_REPORT_RECOMMENDATION_SECTIONS:
+        if recs := recommendations.get(key):
+            story.append(Paragraph(label, _SUBHEADING_STYLE))
+            story.append(_bullets(recs))
+            if key != 'monitoring_recommendations':
+                story.append(Spacer(1, 6))
+        
+    story.append(Spacer(1, 12))
+
+def _emit_followup(story, analysis, filename, body_part):
+    """Follow-up requirements from the risk assessment"""
+    risk_assessment = analysis.get('risk_assessment')
+    followup = risk_assessment.get('follow_up_requirements') if risk_assessment is not None else None
+    if not followup:
+        return
+    story.append(Paragraph("FOLLOW-UP REQUIREMENTS", _HEADING_STYLE))
+    
+    # Timeline
+    if timeline := followup.get('timeline'):
+        story.append(Paragraph("Timeline", _SUBHEADING_STYLE))
+        
+        timeline_rows = [[key.replace('_', ' ').title(), value] for key, value in timeline.items()]
+        story.append(_kv_table(('Requirement', 'Timeframe'), timeline_rows, _TIMELINE_TBL_STYLE))
+        story.append(Spacer(1, 6))
+        
+    # Imaging followup
+    if imaging_followup := followup.get('imaging_followup'):
+        story.append(Paragraph("Imaging Follow-up", _SUBHEADING_STYLE))
+        story.append(Paragraph(escape(str(imaging_followup)), _NORMAL_STYLE))
+        story.append(Spacer(1, 6))
+        
+    # Specialist referrals
+    if specialist_referrals := followup.get('specialist_referrals'):
+        story.append(Paragraph("Specialist Referrals", _SUBHEADING_STYLE))
+        story.append(Paragraph(escape(", ".join(specialist_referrals)), _NORMAL_STYLE))
+        story.append(Spacer(1, 6))
+        
+    # Monitoring parameters
+    if monitoring_parameters := followup.get('monitoring_parameters'):
+        story.append(Paragraph("Monitoring Parameters", _SUBHEADING_STYLE))
+        story.append(_bullets(monitoring_parameters))
+        
+    story.append(Spacer(1, 12))
+
+def _emit_quality(story, analysis, filename, body_part):
+    """Image quality assessment and recommended improvements"""
+    quality = analysis.get('quality_assessment')
+    if quality is None:
+        return
+    story.append(Paragraph("IMAGE QUALITY ASSESSMENT", _HEADING_STYLE))
+    
+    story.append(_kv_table(('Aspect', 'Rating'), _kv_rows(quality, _QUALITY_FIELDS), _QUALITY_TBL_STYLE))
+    
+    # Quality recommendations
+    if improvements := quality.get('recommended_improvements'):
+        story.append(Spacer(1, 8))
+        story.append(Paragraph("Recommended Improvements", _SUBHEADING_STYLE))
+        story.append(_bullets(improvements))
+    
+    story.append(Spacer(1, 12))
+
+def _emit_technical(story, analysis, filename, body_part):
+    """Technical details table"""
+    technical = analysis.get('technical_details')
+    if technical is None:
+        return
+    story.append(Paragraph("TECHNICAL DETAILS", _HEADING_STYLE))
+    
+    story.append(_kv_table(('Parameter', 'Value'), _kv_rows(technical, _TECHNICAL_FIELDS), _TECH_TBL_STYLE))
+    story.append(Spacer(1, 12))
+
+def _emit_confidence(story, analysis, filename, body_part):
+    """Confidence assessment and the factors affecting it"""
+    confidence = analysis.get('confidence_metrics')
+    if confidence is None:
+        return
+    story.append(Paragraph("CONFIDENCE ASSESSMENT", _HEADING_STYLE))
+    
+    story.append(_kv_table(('Metric', 'Value'), _kv_rows(confidence, _CONFIDENCE_FIELDS), _CONFIDENCE_TBL_STYLE))
+    
+    # Factors affecting confidence
+    if factors := confidence.get('factors_affecting_confidence'):
+        story.append(Spacer(1, 8))
+        story.append(Paragraph("Factors Affecting Confidence", _SUBHEADING_STYLE))
+        story.append(_bullets(factors))
+            
+    story.append(Spacer(1, 12))
+
+# The disclaimer is identical in every report, so its markup is parsed once. The layout
+# engine records per-build state (e.g. page-break postponement) on flowables, so each
+# report gets a shallow copy that shares the parsed fragments.
+_DISCLAIMER_HEADING_PARA = Paragraph("DISCLAIMER", _HEADING_STYLE)
+_DISCLAIMER_PARA = Paragraph(
+    "This is a preliminary AI-assisted analysis for licensed clinicians only. This is not a diagnosis and should not replace professional medical judgment. Always consult with qualified healthcare providers for proper diagnosis and treatment.",
+    _NORMAL_STYLE
+)
+
+def _emit_disclaimer(story, analysis, filename, body_part):
+    """Closing disclaimer"""
+    story.append(copy.copy(_DISCLAIMER_HEADING_PARA))
+    story.append(copy.copy(_DISCLAIMER_PARA))
+
+# Report sections in page order
+_PDF_SECTIONS = (
+    _emit_title,
+    _emit_patient_info,
+    _emit_classification,
+    _emit_risk,
+    _emit_findings,
+    _emit_differential,
+    _emit_recommendations,
+    _emit_followup,
+    _emit_quality,
+    _emit_technical,
+    _emit_confidence,
+    _emit_disclaimer,
+)
+
+def _render_pdf(filename: str, body_part: str, analysis: dict) -> bytes:
+    """Lay out the enhanced PDF medical report and return the document bytes"""
+    pdf_buffer = _PDFSink()
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4)
+    story = []
+    for emit in _PDF_SECTIONS:
+        emit(story, analysis, filename, body_part)
+    
+    # Build PDF
+    doc.build(story)
+    return pdf_buffer.getvalue()
+
+# Recently rendered PDFs keyed by (payload digest, filename, body part) so that
+# repeated downloads of the same report skip ReportLab. Only touched from the event loop.
+_PDF_CACHE_SIZE = 64
+_pdf_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+def _pdf_cache_key(analysis_data: str, filename: str, body_part: str) -> tuple:
+    """Build the rendered-PDF cache key from the raw request fields"""
+    return hashlib.blake2b(analysis_data.encode(), digest_size=16).digest(), filename, body_part
+
+async def _render_pdf_in_pool(filename: str, body_part: str, analysis: dict) -> bytes:
+    """Render a report in the PDF worker pool"""
+    # ReportLab layout is synchronous, so render off the event loop
+    async with _PDF_RENDER_SEMAPHORE:
+        return await _pdf_pool.run(_render_pdf, filename, body_part, analysis)
+
+def _pdf_response(pdf_bytes: bytes, filename: str) -> Response:
+    """Return PDF data directly as a download"""
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename={filename}_enhanced_medical_report.pdf"}
+    )
+
 @app.post("/generate-pdf-report")
 async def generate_pdf_report(
     filename: str = Form(...),
@@ -2580,457 +3340,31 @@ async def generate_pdf_report(
 ):
     """Generate an enhanced professional PDF medical report"""
     try:
-        import json
-        analysis = json.loads(analysis_data)
-        
-        # Create PDF
-        pdf_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=A4)
-        story = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=20,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.darkblue
-        )
-        
-        subheading_style = ParagraphStyle(
-            'CustomSubheading',
-            parent=styles['Heading3'],
-            fontSize=12,
-            spaceAfter=8,
-            spaceBefore=10,
-            textColor=colors.darkslateblue
-        )
+        cache_key = _pdf_cache_key(analysis_data, filename, body_part)
+        pdf_bytes = _lru_get(_pdf_cache, cache_key)
+        if pdf_bytes is None:
+            analysis = _parse_analysis_data(analysis_data)
+            pdf_bytes = await _render_pdf_in_pool(filename, body_part, analysis)
+            _lru_put(_pdf_cache, cache_key, pdf_bytes, _PDF_CACHE_SIZE)
         
-        normal_style = styles['Normal']
+        return _pdf_response(pdf_bytes, filename)
         
-        # Title with enhanced styling
-        story.append(Paragraph("MEDSCOPE-AI - ENHANCED MEDICAL IMAGE ANALYSIS REPORT", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Patient Information
-        story.append(Paragraph("PATIENT INFORMATION", heading_style))
-        story.append(Paragraph(f"<b>File:</b> {filename}", normal_style))
-        story.append(Paragraph(f"<b>Body Part:</b> {body_part.upper()}", normal_style))
-        story.append(Paragraph(f"<b>Analysis Date:</b> {analysis.get('analysis_timestamp', datetime.now().isoformat())}", normal_style))
-        story.append(Spacer(1, 12))
-        
-        # Enhanced Medical Classification
-        if 'medical_classification' in analysis:
-            story.append(Paragraph("MEDICAL CLASSIFICATION", heading_style))
-            classification = analysis['medical_classification']
-            
-            # More comprehensive classification table
-            classification_data = [
-                ['Attribute', 'Value'],
-                ['Primary Condition', classification.get('primary_condition', 'N/A')],
-                ['Risk Level', classification.get('risk_level', 'N/A')],
-                ['Risk Score', f"{classification.get('risk_score', 0)}/100"],
-                ['Urgency', classification.get('urgency', 'ROUTINE')],
-                ['Confidence Level', classification.get('confidence_level', 'MODERATE')]
-            ]
-            
-            # Add secondary conditions if present
-            if classification.get('secondary_conditions'):
-                classification_data.append(['Secondary Conditions', ', '.join(classification.get('secondary_conditions', []))])
-                
-            classification_table = Table(classification_data, colWidths=[2*inch, 3*inch])
-            classification_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(classification_table)
-            
-            # Add condition scores if present
-            if classification.get('condition_scores'):
-                story.append(Spacer(1, 10))
-                story.append(Paragraph("Condition Likelihood Scores", subheading_style))
-                cs = classification.get('condition_scores', {})
-                
-                condition_data = [['Condition', 'Score (0-100)']]
-                for condition, score in cs.items():
-                    condition_data.append([condition.capitalize(), str(score)])
-                
-                condition_table = Table(condition_data, colWidths=[2*inch, 3*inch])
-                condition_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(condition_table)
-            
-            # Add contributing factors
-            if classification.get('contributing_factors'):
-                story.append(Spacer(1, 10))
-                story.append(Paragraph("Contributing Factors", subheading_style))
-                for factor in classification.get('contributing_factors', []):
-                    story.append(Paragraph(f"• {factor}", normal_style))
-            
-            story.append(Spacer(1, 12))
-        
-        # Risk Assessment (new section)
-        if 'risk_assessment' in analysis:
-            story.append(Paragraph("COMPREHENSIVE RISK ASSESSMENT", heading_style))
-            risk_assessment = analysis['risk_assessment']
-            
-            # Overall risk
-            overall_risk = risk_assessment.get('overall_risk', {})
-            overall_data = [
-                ['Attribute', 'Value'],
-                ['Risk Category', overall_risk.get('risk_category', 'UNKNOWN')],
-                ['Urgency Level', overall_risk.get('urgency_level', 'ROUTINE')]
-            ]
-            
-            risk_table = Table(overall_data, colWidths=[2*inch, 3*inch])
-            risk_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkred),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.mistyrose),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(risk_table)
-            
-            # Specific risks
-            specific_risks = risk_assessment.get('specific_risks', {})
-            if specific_risks:
-                story.append(Spacer(1, 10))
-                
-                # Immediate risks
-                if specific_risks.get('immediate_risks'):
-                    story.append(Paragraph("Immediate Risks", subheading_style))
-                    for risk in specific_risks.get('immediate_risks', []):
-                        story.append(Paragraph(f"• {risk}", normal_style))
-                    story.append(Spacer(1, 6))
-                
-                # Short-term risks
-                if specific_risks.get('short_term_risks'):
-                    story.append(Paragraph("Short-term Risks", subheading_style))
-                    for risk in specific_risks.get('short_term_risks', []):
-                        story.append(Paragraph(f"• {risk}", normal_style))
-                    story.append(Spacer(1, 6))
-                
-                # Long-term risks
-                if specific_risks.get('long_term_risks'):
-                    story.append(Paragraph("Long-term Risks", subheading_style))
-                    for risk in specific_risks.get('long_term_risks', []):
-                        story.append(Paragraph(f"• {risk}", normal_style))
-            
-            # Clinical significance
-            clinical_sig = risk_assessment.get('clinical_significance', {})
-            if clinical_sig:
-                story.append(Spacer(1, 10))
-                story.append(Paragraph("Clinical Significance", subheading_style))
-                
-                clinical_data = [
-                    ['Attribute', 'Assessment'],
-                    ['Clinical Impact', clinical_sig.get('clinical_impact', 'UNKNOWN')],
-                    ['Treatment Urgency', clinical_sig.get('treatment_urgency', 'ROUTINE')],
-                    ['Prognosis Impact', clinical_sig.get('prognosis_impact', 'MINIMAL')]
-                ]
-                
-                clinical_table = Table(clinical_data, colWidths=[2*inch, 3*inch])
-                clinical_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightsteelblue),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(clinical_table)
-            
-            story.append(Spacer(1, 12))
-        
-        # Medical Findings
-        if 'medical_findings' in analysis:
-            story.append(Paragraph("MEDICAL FINDINGS", heading_style))
-            findings = analysis['medical_findings']
-            
-            findings_data = [
-                ['Finding', 'Details'],
-                ['Potential Masses/Lesions', str(findings.get('potential_masses', 0))],
-                ['Asymmetry', 'Yes' if findings.get('asymmetry_detected', False) else 'No'],
-                ['Asymmetry Details', findings.get('asymmetry_interpretation', 'N/A')],
-                ['Texture Variations', findings.get('texture_variations', 'N/A')],
-                ['Contour Analysis', findings.get('contour_analysis', 'N/A')]
-            ]
-            
-            findings_table = Table(findings_data, colWidths=[2*inch, 3*inch])
-            findings_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(findings_table)
-            
-            # Condition evidence
-            cond_evidence = findings.get('condition_evidence', {})
-            if any(cond_evidence.get(k) for k in ['tumor', 'hemorrhage', 'fracture']):
-                story.append(Spacer(1, 10))
-                story.append(Paragraph("Condition Evidence", subheading_style))
-                
-                for k in ['tumor', 'hemorrhage', 'fracture']:
-                    ev_list = cond_evidence.get(k, [])
-                    if ev_list:
-                        story.append(Paragraph(f"<b>{k.capitalize()}:</b> " + "; ".join(ev_list), normal_style))
-                        story.append(Spacer(1, 4))
-            
-            story.append(Spacer(1, 12))
-        
-        # Differential Diagnosis (new section)
-        if 'risk_assessment' in analysis and analysis['risk_assessment'].get('differential_diagnosis'):
-            story.append(Paragraph("DIFFERENTIAL DIAGNOSIS", heading_style))
-            differentials = analysis['risk_assessment'].get('differential_diagnosis', [])
-            
-            for diff in differentials:
-                story.append(Paragraph(f"• {diff}", normal_style))
-                
-            story.append(Spacer(1, 12))
-        
-        # Enhanced Doctor Recommendations
-        if 'doctor_recommendations' in analysis:
-            story.append(Paragraph("CLINICAL RECOMMENDATIONS", heading_style))
-            recommendations = analysis['doctor_recommendations']
-            
-            # Urgency-based actions
-            if recommendations.get('urgency_based_actions'):
-                story.append(Paragraph("Urgency-Based Actions", subheading_style))
-                for rec in recommendations['urgency_based_actions']:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                story.append(Spacer(1, 6))
-            
-            # Risk-based recommendations
-            if recommendations.get('risk_based_recommendations'):
-                story.append(Paragraph("Risk-Based Recommendations", subheading_style))
-                for rec in recommendations['risk_based_recommendations']:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                story.append(Spacer(1, 6))
-            
-            # Medical recommendations
-            if recommendations.get('medical_recommendations'):
-                story.append(Paragraph("Medical Recommendations", subheading_style))
-                for rec in recommendations['medical_recommendations']:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                story.append(Spacer(1, 6))
-            
-            # Patient management
-            if recommendations.get('patient_management'):
-                story.append(Paragraph("Patient Management", subheading_style))
-                for rec in recommendations['patient_management']:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                story.append(Spacer(1, 6))
-                
-            # Specialist consultations
-            if recommendations.get('specialist_consultations'):
-                story.append(Paragraph("Specialist Consultations", subheading_style))
-                for rec in recommendations['specialist_consultations']:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                story.append(Spacer(1, 6))
-                
-            # Imaging recommendations
-            if recommendations.get('imaging_recommendations'):
-                story.append(Paragraph("Imaging Recommendations", subheading_style))
-                for rec in recommendations['imaging_recommendations']:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                story.append(Spacer(1, 6))
-                
-            # Monitoring recommendations
-            if recommendations.get('monitoring_recommendations'):
-                story.append(Paragraph("Monitoring Recommendations", subheading_style))
-                for rec in recommendations['monitoring_recommendations']:
-                    story.append(Paragraph(f"• {rec}", normal_style))
-                
-            story.append(Spacer(1, 12))
-        
-        # Follow-up Requirements (new section)
-        if 'risk_assessment' in analysis and analysis['risk_assessment'].get('follow_up_requirements'):
-            story.append(Paragraph("FOLLOW-UP REQUIREMENTS", heading_style))
-            followup = analysis['risk_assessment'].get('follow_up_requirements', {})
-            
-            # Timeline
-            if followup.get('timeline'):
-                story.append(Paragraph("Timeline", subheading_style))
-                timeline = followup.get('timeline', {})
-                
-                timeline_data = [['Requirement', 'Timeframe']]
-                for key, value in timeline.items():
-                    timeline_data.append([key.replace('_', ' ').title(), value])
-                
-                timeline_table = Table(timeline_data, colWidths=[2*inch, 3*inch])
-                timeline_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightsteelblue),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(timeline_table)
-                story.append(Spacer(1, 6))
-                
-            # Imaging followup
-            if followup.get('imaging_followup'):
-                story.append(Paragraph("Imaging Follow-up", subheading_style))
-                story.append(Paragraph(followup.get('imaging_followup'), normal_style))
-                story.append(Spacer(1, 6))
-                
-            # Specialist referrals
-            if followup.get('specialist_referrals'):
-                story.append(Paragraph("Specialist Referrals", subheading_style))
-                story.append(Paragraph(", ".join(followup.get('specialist_referrals', [])), normal_style))
-                story.append(Spacer(1, 6))
-                
-            # Monitoring parameters
-            if followup.get('monitoring_parameters'):
-                story.append(Paragraph("Monitoring Parameters", subheading_style))
-                for param in followup.get('monitoring_parameters', []):
-                    story.append(Paragraph(f"• {param}", normal_style))
-                
-            story.append(Spacer(1, 12))
-        
-        # Quality Assessment
-        if 'quality_assessment' in analysis:
-            story.append(Paragraph("IMAGE QUALITY ASSESSMENT", heading_style))
-            quality = analysis['quality_assessment']
-            
-            quality_data = [
-                ['Aspect', 'Rating'],
-                ['Overall Rating', quality.get('overall_rating', 'N/A')],
-                ['Diagnostic Quality', quality.get('diagnostic_quality', 'N/A')],
-                ['Sharpness', quality.get('sharpness_rating', 'N/A')],
-                ['Contrast', quality.get('contrast_rating', 'N/A')],
-                ['Noise Level', quality.get('noise_rating', 'N/A')]
-            ]
-            
-            quality_table = Table(quality_data, colWidths=[2*inch, 3*inch])
-            quality_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(quality_table)
-            
-            # Quality recommendations
-            if quality.get('recommended_improvements'):
-                story.append(Spacer(1, 8))
-                story.append(Paragraph("Recommended Improvements", subheading_style))
-                for improvement in quality.get('recommended_improvements', []):
-                    story.append(Paragraph(f"• {improvement}", normal_style))
-            
-            story.append(Spacer(1, 12))
-        
-        # Technical Details
-        if 'technical_details' in analysis:
-            story.append(Paragraph("TECHNICAL DETAILS", heading_style))
-            technical = analysis['technical_details']
-            
-            tech_data = [
-                ['Parameter', 'Value'],
-                ['Image Dimensions', technical.get('image_dimensions', 'N/A')],
-                ['Analysis Algorithm', technical.get('analysis_algorithm', 'N/A')],
-                ['Confidence Metrics', technical.get('confidence_score', 'N/A')]
-            ]
-            
-            tech_table = Table(tech_data, colWidths=[2*inch, 3*inch])
-            tech_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(tech_table)
-            story.append(Spacer(1, 12))
-        
-        # Confidence Metrics (new section)
-        if 'confidence_metrics' in analysis:
-            story.append(Paragraph("CONFIDENCE ASSESSMENT", heading_style))
-            confidence = analysis['confidence_metrics']
-            
-            confidence_data = [
-                ['Metric', 'Value'],
-                ['Overall Confidence', confidence.get('overall_confidence', 'MODERATE')],
-                ['Classification Confidence', f"{confidence.get('classification_confidence', 0.7):.2f}"],
-                ['Feature Extraction Confidence', f"{confidence.get('feature_extraction_confidence', 0.8):.2f}"]
-            ]
-            
-            confidence_table = Table(confidence_data, colWidths=[2*inch, 3*inch])
-            confidence_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkslateblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(confidence_table)
-            
-            # Factors affecting confidence
-            if confidence.get('factors_affecting_confidence'):
-                story.append(Spacer(1, 8))
-                story.append(Paragraph("Factors Affecting Confidence", subheading_style))
-                for factor in confidence.get('factors_affecting_confidence', []):
-                    story.append(Paragraph(f"• {factor}", normal_style))
-                    
-            story.append(Spacer(1, 12))
-        
-        # Disclaimer
-        story.append(Paragraph("DISCLAIMER", heading_style))
-        disclaimer_text = "This is a preliminary AI-assisted analysis for licensed clinicians only. This is not a diagnosis and should not replace professional medical judgment. Always consult with qualified healthcare providers for proper diagnosis and treatment."
-        story.append(Paragraph(disclaimer_text, normal_style))
-        
-        # Build PDF
-        doc.build(story)
-        pdf_buffer.seek(0)
-        
-        # Return PDF data directly
-        from fastapi.responses import Response
-        return Response(
-            content=pdf_buffer.getvalue(),
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}_enhanced_medical_report.pdf"}
-        )
+    except Exception as e:
+        logger.error(f"PDF generation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
+
+class PdfReportRequest(BaseModel):
+    """JSON body of /generate-pdf-report-json"""
+    filename: str
+    body_part: str
+    analysis: dict
+
+@app.post("/generate-pdf-report-json")
+async def generate_pdf_report_json(payload: PdfReportRequest):
+    """Generate the enhanced PDF medical report from an analysis posted as a JSON body"""
+    try:
+        pdf_bytes = await _render_pdf_in_pool(payload.filename, payload.body_part, payload.analysis)
+        return _pdf_response(pdf_bytes, payload.filename)
         
     except Exception as e:
         logger.error(f"PDF generation failed: {str(e)}")
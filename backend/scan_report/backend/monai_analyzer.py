@@ -7,22 +7,82 @@ import numpy as np
 import cv2
 from PIL import Image
 import torch
-import torch.nn.functional as F
-from monai.transforms import (
-    Compose, LoadImage, Resize, ToTensor, NormalizeIntensity,
-    ScaleIntensity, Spacing, Orientation, CropForeground
-)
-from monai.networks.nets import UNet
-from monai.networks.layers import Norm
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional
-import json
 
 logger = logging.getLogger(__name__)
 
+# Optional GPU CLAHE for batched preprocessing
+try:
+    import cupy as cp
+    from cucim.skimage.exposure import equalize_adapthist
+    HAS_CUCIM = True
+except ImportError:
+    HAS_CUCIM = False
+
+# Below this batch size the host<->device copies outweigh the GPU CLAHE speedup
+_GPU_CLAHE_MIN_BATCH = 4
+
+# Gray planes with a standard deviation below this are treated as blank for contour analysis
+_FLAT_PLANE_STD = 1.0
+
+# Largest contours listed in the pattern findings; the mass count covers all of them
+_MAX_REPORTED_CONTOURS = 20
+
+# Area bin edges (pixels) for the potential-mass size histogram
+_CONTOUR_AREA_BINS = [100, 250, 500, 1000, 2500, 5000, 10000, np.inf]
+
+# File types whose headers are checked for EXIF metadata
+_EXIF_EXTENSIONS = {".jpg", ".jpeg", ".tif", ".tiff"}
+
+# Edge density is measured on a copy whose longer side is at most this many pixels
+_EDGE_MAX_SIDE = 128
+
+# Optional JIT compilation for the single-pass RGB statistics kernel
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    logger.info("Numba not available, RGB statistics use OpenCV reductions")
+
+# Numba's default workqueue threading layer aborts on concurrent parallel launches
+_RGB_STATS_LOCK = threading.Lock()
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _rgb_stats(img):
+        """Integer sums, sums of squares and extrema of an HxWxC image, plus |R-G| and |G-B| moments, in one pass"""
+        h, w = img.shape[0], img.shape[1]
+        total = 0
+        total_sq = 0
+        lo = np.int64(img[0, 0, 0])
+        hi = lo
+        rg = 0
+        rg_sq = 0
+        gb = 0
+        gb_sq = 0
+        for y in prange(h):
+            for x in range(w):
+                r = np.int64(img[y, x, 0])
+                g = np.int64(img[y, x, 1])
+                b = np.int64(img[y, x, 2])
+                total += r + g + b
+                total_sq += r * r + g * g + b * b
+                lo = min(lo, min(r, min(g, b)))
+                hi = max(hi, max(r, max(g, b)))
+                d = abs(r - g)
+                rg += d
+                rg_sq += d * d
+                d = abs(g - b)
+                gb += d
+                gb_sq += d * d
+        return total, total_sq, lo, hi, rg, rg_sq, gb, gb_sq
+
 class MONAIMedicalAnalyzer:
     """Medical image analysis using MONAI framework"""
     
@@ -30,13 +90,18 @@ class MONAIMedicalAnalyzer:
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         logger.info(f"Using device: {self.device}")
         
-        # Initialize MONAI transforms
-        self.transforms = Compose([
-            LoadImage(image_only=True),
-            ScaleIntensity(minv=0.0, maxv=1.0),
-            Resize(spatial_size=(256, 256)),
-            ToTensor()
-        ])
+        # CLAHE contrast enhancers keep internal buffers, so each thread reuses its own
+        self._thread_state = threading.local()
+        self._use_gpu_clahe = HAS_CUCIM and self.device.type == "cuda"
+        
+        # Preprocessing steps per image kind, each called as step(image, gpu_clahe)
+        self._pipelines = {
+            # Grayscale medical image (X-ray, CT, MRI): CLAHE straight on the gray plane,
+            # which is kept single-channel for the analysis stages
+            "gray": (lambda image, gpu_clahe: cv2.cvtColor(image, cv2.COLOR_RGB2GRAY), self._apply_clahe),
+            # Colour image: CLAHE on the luma channel only
+            "rgb": (self._enhance_luma,),
+        }
         
         # Medical analysis parameters
         self.medical_terms = {
@@ -48,27 +113,56 @@ class MONAIMedicalAnalyzer:
             'atrophy': ['atrophy', 'shrinkage', 'degeneration']
         }
     
-    def analyze_medical_image(self, image_path: str, filename: str) -> Dict:
+    def batch_analyze(self, items: List[Tuple[str, str]]) -> List[Dict]:
+        """Analyze several (image_path, filename) pairs, using GPU CLAHE for large enough batches"""
+        if not items:
+            return []
+        gpu_clahe = self._use_gpu_clahe and len(items) >= _GPU_CLAHE_MIN_BATCH
+        
+        # Decoding and preprocessing run in OpenCV/PIL code that releases the GIL
+        with ThreadPoolExecutor(max_workers=min(len(items), os.cpu_count() or 1)) as pool:
+            images = list(pool.map(
+                lambda image_path: self._load_and_preprocess_image(image_path, gpu_clahe),
+                [image_path for image_path, _ in items]
+            ))
+        
+        return [
+            self._analyze_loaded_image(image, image_path, filename)
+            for image, (image_path, filename) in zip(images, items)
+        ]
+    
+    def analyze_medical_image(self, image_path: str, filename: str, gpu_clahe: bool = False) -> Dict:
         """Analyze medical image using MONAI and computer vision techniques"""
+        logger.info(f"Starting MONAI analysis for: {filename}")
+        
+        # Load and preprocess image
+        image = self._load_and_preprocess_image(image_path, gpu_clahe)
+        return self._analyze_loaded_image(image, image_path, filename)
+    
+    def _analyze_loaded_image(self, image: Optional[np.ndarray], image_path: str, filename: str) -> Dict:
+        """Run the analysis stages on an already loaded and preprocessed image"""
         try:
-            logger.info(f"Starting MONAI analysis for: {filename}")
-            
-            # Load and preprocess image
-            image = self._load_and_preprocess_image(image_path)
             if image is None:
                 logger.error(f"Failed to load image: {filename}")
                 return self._create_error_response(filename, "Failed to load image")
             
             logger.info(f"Image loaded successfully: {filename}, shape: {image.shape}")
             
+            # Grayscale plane shared by every analysis stage
+            gray = self._to_gray(image)
+            
+            # Quality and pattern results also drive the recommendations
+            patterns = self._detect_medical_patterns(image, gray)
+            quality = self._assess_image_quality(image, gray)
+            
             # Perform comprehensive analysis
             analysis_results = {
                 "filename": filename,
                 "file_type": "medical_image",
-                "image_analysis": self._analyze_image_features(image),
-                "medical_findings": self._detect_medical_patterns(image),
-                "quality_assessment": self._assess_image_quality(image),
-                "recommendations": self._generate_recommendations(image),
+                "image_analysis": self._analyze_image_features(image, gray),
+                "medical_findings": patterns,
+                "quality_assessment": quality,
+                "recommendations": self._generate_recommendations(quality, patterns),
                 "technical_details": self._extract_technical_info(image_path)
             }
             
@@ -84,7 +178,7 @@ class MONAIMedicalAnalyzer:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return self._create_error_response(filename, f"Analysis error: {str(e)}")
     
-    def _load_and_preprocess_image(self, image_path: str) -> Optional[np.ndarray]:
+    def _load_and_preprocess_image(self, image_path: str, gpu_clahe: bool = False) -> Optional[np.ndarray]:
         """Load and preprocess medical image"""
         try:
             logger.info(f"Loading image: {image_path}")
@@ -107,7 +201,7 @@ class MONAIMedicalAnalyzer:
                 return None
             
             # Apply medical image preprocessing
-            image = self._apply_medical_preprocessing(image)
+            image = self._apply_medical_preprocessing(image, gpu_clahe)
             
             logger.info(f"Image preprocessing completed: {image.shape}, dtype: {image.dtype}")
             return image
@@ -118,24 +212,13 @@ class MONAIMedicalAnalyzer:
             logger.error(f"Image loading traceback: {traceback.format_exc()}")
             return None
     
-    def _apply_medical_preprocessing(self, image: np.ndarray) -> np.ndarray:
-        """Apply medical image-specific preprocessing"""
+    def _apply_medical_preprocessing(self, image: np.ndarray, gpu_clahe: bool = False) -> np.ndarray:
+        """Apply medical image-specific preprocessing (grayscale images come back as a single plane)"""
         try:
-            # Convert to grayscale if it's a medical image (X-ray, CT, MRI)
+            # Enhance contrast for medical images with the pipeline for this image kind
             if len(image.shape) == 3:
-                # Check if it's a grayscale medical image
-                if np.std(image[:,:,0] - image[:,:,1]) < 5 and np.std(image[:,:,1] - image[:,:,2]) < 5:
-                    image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-                    image = np.stack([image, image, image], axis=-1)
-            
-            # Enhance contrast for medical images
-            if len(image.shape) == 3:
-                lab = cv2.cvtColor(image, cv2.COLOR_RGB2LAB)
-                l, a, b = cv2.split(lab)
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                l = clahe.apply(l)
-                lab = cv2.merge([l, a, b])
-                image = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+                for step in self._pipelines["gray" if self._is_grayscale(image) else "rgb"]:
+                    image = step(image, gpu_clahe)
             
             return image
             
@@ -143,7 +226,63 @@ class MONAIMedicalAnalyzer:
             logger.error(f"Preprocessing failed: {e}")
             return image
     
-    def _analyze_image_features(self, image: np.ndarray) -> Dict:
+    def _is_grayscale(self, image: np.ndarray) -> bool:
+        """Check if an RGB image is a grayscale medical image (channels differ by at most a near-constant offset)"""
+        if HAS_NUMBA and image.shape[2] == 3:
+            with _RGB_STATS_LOCK:
+                _, _, _, _, rg, rg_sq, gb, gb_sq = _rgb_stats(image)
+            n = image.shape[0] * image.shape[1]
+            rg_std = np.sqrt(max(rg_sq / n - (rg / n) ** 2, 0.0))
+            gb_std = np.sqrt(max(gb_sq / n - (gb / n) ** 2, 0.0))
+        else:
+            r, g, b = cv2.split(image)[:3]
+            rg_std = cv2.meanStdDev(cv2.absdiff(r, g))[1][0, 0]
+            gb_std = cv2.meanStdDev(cv2.absdiff(g, b))[1][0, 0]
+        return rg_std < 5 and gb_std < 5
+    
+    def _intensity_stats(self, image: np.ndarray) -> Tuple[float, float, int, int]:
+        """Mean, standard deviation, minimum and maximum of an image, pooled over all channels"""
+        if HAS_NUMBA and len(image.shape) == 3 and image.shape[2] == 3:
+            with _RGB_STATS_LOCK:
+                total, total_sq, lo, hi, _, _, _, _ = _rgb_stats(image)
+            n = image.shape[0] * image.shape[1] * 3
+            mean = total / n
+            return mean, float(np.sqrt(max(total_sq / n - mean ** 2, 0.0))), int(lo), int(hi)
+        channel_mean, channel_std = cv2.meanStdDev(image)
+        mean = float(channel_mean.mean())
+        std = float(np.sqrt(max((channel_std ** 2 + channel_mean ** 2).mean() - mean ** 2, 0.0)))
+        min_val, max_val, _, _ = cv2.minMaxLoc(image.reshape(image.shape[0], -1))
+        return mean, std, int(min_val), int(max_val)
+    
+    def _get_clahe(self):
+        """Return this thread's CLAHE enhancer, creating it on first use"""
+        clahe = getattr(self._thread_state, "clahe", None)
+        if clahe is None:
+            clahe = self._thread_state.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+        return clahe
+    
+    def _apply_clahe(self, plane: np.ndarray, gpu: bool = False) -> np.ndarray:
+        """Run CLAHE on a single uint8 plane, on the GPU via cuCIM when requested"""
+        if not gpu:
+            return self._get_clahe().apply(plane)
+        # 8x8 tiles; OpenCV's clip limit of 2.0 is relative to the mean bin count of 256 bins
+        tile = (max(plane.shape[0] // 8, 1), max(plane.shape[1] // 8, 1))
+        enhanced = equalize_adapthist(cp.asarray(plane), kernel_size=tile, clip_limit=2.0 / 256, nbins=256)
+        return cp.asnumpy(cp.rint(enhanced * 255).astype(cp.uint8))
+    
+    def _enhance_luma(self, image: np.ndarray, gpu_clahe: bool = False) -> np.ndarray:
+        """Apply CLAHE to the Y channel of an RGB image"""
+        ycrcb = cv2.cvtColor(image, cv2.COLOR_RGB2YCrCb)
+        cv2.insertChannel(self._apply_clahe(cv2.extractChannel(ycrcb, 0), gpu_clahe), ycrcb, 0)
+        return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB)
+    
+    def _to_gray(self, image: np.ndarray) -> np.ndarray:
+        """Return the grayscale plane of an RGB image (single-channel images are returned as-is)"""
+        if len(image.shape) == 3:
+            return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        return image
+    
+    def _analyze_image_features(self, image: np.ndarray, gray: Optional[np.ndarray] = None) -> Dict:
         """Analyze basic image features"""
         try:
             features = {}
@@ -153,24 +292,28 @@ class MONAIMedicalAnalyzer:
             features["channels"] = image.shape[2] if len(image.shape) == 3 else 1
             features["data_type"] = str(image.dtype)
             
-            # Image statistics
-            if len(image.shape) == 3:
-                features["mean_intensity"] = np.mean(image)
-                features["std_intensity"] = np.std(image)
-                features["min_intensity"] = np.min(image)
-                features["max_intensity"] = np.max(image)
+            # Image statistics pooled over all channels
+            mean, std, min_val, max_val = self._intensity_stats(image)
+            features["mean_intensity"] = mean
+            features["std_intensity"] = std
+            features["min_intensity"] = min_val
+            features["max_intensity"] = max_val
             
             # Edge detection for medical features
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image
+            if gray is None:
+                gray = self._to_gray(image)
             
-            edges = cv2.Canny(gray, 50, 150)
-            features["edge_density"] = np.sum(edges > 0) / (edges.shape[0] * edges.shape[1])
+            # Edge density is a ratio, so a downsampled plane gives a comparable figure
+            edge_plane = gray
+            scale = _EDGE_MAX_SIDE / max(gray.shape)
+            if scale < 1:
+                edge_plane = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            edges = cv2.Canny(edge_plane, 50, 150)
+            features["edge_density"] = cv2.countNonZero(edges) / float(edges.size)
             
             # Texture analysis
-            features["texture_variance"] = np.var(gray)
+            _, gray_std = cv2.meanStdDev(gray)
+            features["texture_variance"] = float(gray_std[0, 0] ** 2)
             
             return features
             
@@ -178,51 +321,70 @@ class MONAIMedicalAnalyzer:
             logger.error(f"Feature analysis failed: {e}")
             return {"error": f"Feature analysis failed: {str(e)}"}
     
-    def _detect_medical_patterns(self, image: np.ndarray) -> Dict:
+    def _detect_medical_patterns(self, image: np.ndarray, gray: Optional[np.ndarray] = None) -> Dict:
         """Detect medical patterns and abnormalities"""
         try:
             findings = {}
             
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            if gray is None:
+                gray = self._to_gray(image)
+            
+            # Detect potential masses/lesions using contour analysis on an Otsu-binarized image.
+            # A flat plane (blank or failed exposure) has no meaningful Otsu split: every pixel
+            # lands above the cut and the whole frame would become one "mass", so skip it.
+            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+            if cv2.meanStdDev(gray)[1][0, 0] < _FLAT_PLANE_STD or cv2.countNonZero(binary) == binary.size:
+                contours = ()
             else:
-                gray = image
-            
-            # Detect potential masses/lesions using contour analysis
-            contours, _ = cv2.findContours(
-                cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)[1],
-                cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-            )
-            
-            # Analyze contours for medical significance
-            significant_contours = []
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > 100:  # Filter small noise
-                    perimeter = cv2.arcLength(contour, True)
-                    circularity = 4 * np.pi * area / (perimeter * perimeter) if perimeter > 0 else 0
-                    
-                    if circularity > 0.3:  # Potential mass/lesion
-                        significant_contours.append({
-                            "area": area,
-                            "circularity": circularity,
-                            "perimeter": perimeter
-                        })
-            
-            findings["potential_masses"] = len(significant_contours)
-            findings["contour_analysis"] = significant_contours
+                contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            
+            # Analyze contours for medical significance: filter noise (area <= 100)
+            # and keep roughly round shapes as potential masses/lesions
+            areas = np.fromiter((cv2.contourArea(c) for c in contours), dtype=np.float64, count=len(contours))
+            perimeters = np.fromiter((cv2.arcLength(c, True) for c in contours), dtype=np.float64, count=len(contours))
+            candidates = (areas > 100) & (perimeters > 0)
+            circularity = np.zeros_like(areas)
+            circularity[candidates] = 4 * np.pi * areas[candidates] / (perimeters[candidates] ** 2)
+            keep = candidates & (circularity > 0.3)
+            
+            # Potential masses stay as parallel per-field arrays
+            mass_areas = areas[keep]
+            mass_circularity = circularity[keep]
+            mass_perimeters = perimeters[keep]
+            findings["potential_masses"] = len(mass_areas)
+            findings["contour_summary"] = {
+                "count": len(mass_areas),
+                "mean_area": float(mass_areas.mean()) if len(mass_areas) else 0.0,
+                "max_circularity": float(mass_circularity.max()) if len(mass_areas) else 0.0,
+                "area_histogram": np.histogram(mass_areas, bins=_CONTOUR_AREA_BINS)[0].tolist()
+            }
+            
+            # Only the largest contours are listed, in descending area order
+            top = np.arange(len(mass_areas))
+            if len(top) > _MAX_REPORTED_CONTOURS:
+                top = np.argpartition(-mass_areas, _MAX_REPORTED_CONTOURS - 1)[:_MAX_REPORTED_CONTOURS]
+            top = top[np.argsort(-mass_areas[top], kind="stable")]
+            
+            findings["contour_analysis"] = [
+                {"area": area, "circularity": circ, "perimeter": perimeter}
+                for area, circ, perimeter in zip(mass_areas[top].tolist(), mass_circularity[top].tolist(), mass_perimeters[top].tolist())
+            ]
             
             # Detect asymmetry (common in medical images)
             left_half = gray[:, :gray.shape[1]//2]
             right_half = gray[:, gray.shape[1]//2:]
             
             if left_half.shape == right_half.shape:
-                asymmetry_score = np.abs(np.mean(left_half) - np.mean(right_half)) / np.mean(gray)
+                # Equal halves, so the image mean is the mean of the two half means
+                left_mean = cv2.mean(left_half)[0]
+                right_mean = cv2.mean(right_half)[0]
+                overall_mean = (left_mean + right_mean) / 2
+                asymmetry_score = abs(left_mean - right_mean) / overall_mean if overall_mean else 0.0
                 findings["asymmetry_score"] = asymmetry_score
                 findings["asymmetry_interpretation"] = "High" if asymmetry_score > 0.2 else "Low"
             
             # Detect intensity variations (potential abnormalities)
-            intensity_variations = np.std(gray)
+            intensity_variations = cv2.meanStdDev(gray)[1][0, 0]
             findings["intensity_variation"] = intensity_variations
             findings["variation_interpretation"] = "High" if intensity_variations > 50 else "Normal"
             
@@ -232,33 +394,33 @@ class MONAIMedicalAnalyzer:
             logger.error(f"Pattern detection failed: {e}")
             return {"error": f"Pattern detection failed: {str(e)}"}
     
-    def _assess_image_quality(self, image: np.ndarray) -> Dict:
+    def _assess_image_quality(self, image: np.ndarray, gray: Optional[np.ndarray] = None) -> Dict:
         """Assess medical image quality"""
         try:
             quality = {}
             
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image
+            if gray is None:
+                gray = self._to_gray(image)
             
-            # Sharpness assessment
-            laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+            # Sharpness assessment (a uint8 Laplacian is integer-valued, so float32 holds it exactly)
+            laplacian_var = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_32F))[1][0, 0] ** 2
             quality["sharpness"] = laplacian_var
             quality["sharpness_rating"] = "High" if laplacian_var > 100 else "Medium" if laplacian_var > 50 else "Low"
             
             # Noise assessment
-            noise_level = np.std(gray)
+            noise_level = cv2.meanStdDev(gray)[1][0, 0]
             quality["noise_level"] = noise_level
             quality["noise_rating"] = "Low" if noise_level < 20 else "Medium" if noise_level < 50 else "High"
             
             # Contrast assessment
-            contrast = np.max(gray) - np.min(gray)
+            min_val, max_val, _, _ = cv2.minMaxLoc(gray)
+            contrast = int(max_val - min_val)
             quality["contrast"] = contrast
             quality["contrast_rating"] = "Good" if contrast > 150 else "Fair" if contrast > 100 else "Poor"
             
             # Overall quality score
-            quality_score = (min(laplacian_var/100, 1) + min(20/noise_level, 1) + min(contrast/150, 1)) / 3
+            noise_term = min(20/noise_level, 1) if noise_level > 0 else 1
+            quality_score = (min(laplacian_var/100, 1) + noise_term + min(contrast/150, 1)) / 3
             quality["overall_score"] = quality_score
             quality["overall_rating"] = "Excellent" if quality_score > 0.8 else "Good" if quality_score > 0.6 else "Fair" if quality_score > 0.4 else "Poor"
             
@@ -268,13 +430,16 @@ class MONAIMedicalAnalyzer:
             logger.error(f"Quality assessment failed: {e}")
             return {"error": f"Quality assessment failed: {str(e)}"}
     
-    def _generate_recommendations(self, image: np.ndarray) -> List[str]:
-        """Generate clinical recommendations based on image analysis"""
+    def _generate_recommendations(self, quality: Dict, patterns: Dict) -> List[str]:
+        """Generate clinical recommendations from the quality and pattern results"""
+        # Recommendations from a failed stage would be misleading
+        if "error" in quality or "error" in patterns:
+            return ["Analysis error - manual review recommended"]
+        
         try:
             recommendations = []
             
             # Quality-based recommendations
-            quality = self._assess_image_quality(image)
             if "overall_rating" in quality:
                 if quality["overall_rating"] in ["Poor", "Fair"]:
                     recommendations.append("Consider re-imaging with improved technique for better diagnostic quality")
@@ -286,7 +451,6 @@ class MONAIMedicalAnalyzer:
                     recommendations.append("High noise levels detected - consider adjusting imaging parameters")
             
             # Pattern-based recommendations
-            patterns = self._detect_medical_patterns(image)
             if patterns.get("potential_masses", 0) > 0:
                 recommendations.append("Potential masses/lesions detected - recommend detailed radiological review")
             
@@ -318,17 +482,18 @@ class MONAIMedicalAnalyzer:
                 info["original_mode"] = img.mode
                 info["original_size"] = f"{img.width}x{img.height}"
                 
-                # Try to extract EXIF data
-                try:
-                    exif = img._getexif()
-                    if exif:
-                        info["has_exif"] = True
-                        # Extract relevant medical imaging metadata
-                        for tag_id, value in exif.items():
-                            if tag_id in [270, 271, 272]:  # Description, Make, Model
-                                info[f"exif_{tag_id}"] = str(value)
-                except:
-                    info["has_exif"] = False
+                # Try to extract EXIF data (only JPEG and TIFF files carry it here)
+                if info["file_extension"] in _EXIF_EXTENSIONS:
+                    try:
+                        exif = img.getexif()
+                        if exif:
+                            info["has_exif"] = True
+                            # Extract relevant medical imaging metadata
+                            for tag_id in (270, 271, 272):  # Description, Make, Model
+                                if tag_id in exif:
+                                    info[f"exif_{tag_id}"] = str(exif[tag_id])
+                    except Exception:
+                        info["has_exif"] = False
             
             return info
             